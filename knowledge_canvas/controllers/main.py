@@ -0,0 +1,138 @@
+import base64
+import binascii
+import hashlib
+import os
+
+from werkzeug.exceptions import BadRequest
+from werkzeug.wsgi import wrap_file
+
+from odoo import http
+from odoo.http import content_disposition, request
+from odoo.tools import consteq
+from odoo.tools.mimetypes import guess_mimetype
+
+from ..models.sketchpad_export import EXPORT_FORMATS
+
+# Public viewers revalidate often, using the ETag to avoid downloading again
+PUBLIC_SKETCHPAD_MAX_AGE = 60
+# Types of the client snapshots that can be served publicly
+PUBLIC_SNAPSHOT_MIMETYPES = ('image/png', 'image/jpeg')
+
+
+class KnowledgeCanvasController(http.Controller):
+
+    def _get_public_sketchpad(self, public_id, signature):
+        """Returns the sketchpad shared with the given public ID, after
+        checking the signature of the URL.
+
+        :raises NotFound: if there is no such sketchpad or the signature is wrong
+        """
+        sketchpad = request.env['knowledge_canvas.sketchpad'].sudo().search([('public_id', '=', public_id)], limit=1)
+        if not sketchpad or not consteq(signature, sketchpad._get_public_signature()):
+            raise request.not_found()
+        return sketchpad
+
+    def _make_public_response(self, etag, body, content_type):
+        headers = [
+            ('Cache-Control', 'public, max-age=%s' % PUBLIC_SKETCHPAD_MAX_AGE),
+            ('X-Content-Type-Options', 'nosniff'),
+        ]
+        if request.httprequest.if_none_match.contains(etag):
+            response = request.make_response('', headers=headers, status=304)
+        else:
+            headers.append(('Content-Type', content_type))
+            response = request.make_response(body, headers=headers)
+        response.set_etag(etag)
+        return response
+
+    @http.route('/knowledge_canvas/sketchpad/<string:public_id>/<string:signature>/strokes', type='http', auth='public', sitemap=False)
+    def get_public_sketchpad_strokes(self, public_id, signature, **kw):
+        """This is the controller serving the strokes of a shared sketchpad,
+        to draw it read-only.
+
+        :param public_id: the public ID of the sketchpad
+        :type public_id: str
+        :param signature: the signature of the public URL
+        :type signature: str
+
+        :returns: the visible strokes as JSON
+        :rtype: http.Response
+        """
+        sketchpad = self._get_public_sketchpad(public_id, signature)
+        version = sketchpad._get_strokes_version()
+        etag = hashlib.sha1(('%s-%s' % (sketchpad.id, version)).encode()).hexdigest()
+        if request.httprequest.if_none_match.contains(etag):
+            return self._make_public_response(etag, '', 'application/json')
+        payload = sketchpad._get_public_strokes_payload(sketchpad.id, version)
+        return self._make_public_response(etag, payload, 'application/json')
+
+    @http.route('/knowledge_canvas/sketchpad/<string:public_id>/<string:signature>/image', type='http', auth='public', sitemap=False)
+    def get_public_sketchpad_image(self, public_id, signature, **kw):
+        """This is the controller serving the image of a shared sketchpad.
+
+        :param public_id: the public ID of the sketchpad
+        :type public_id: str
+        :param signature: the signature of the public URL
+        :type signature: str
+
+        :returns: the image of the sketchpad
+        :rtype: http.Response
+        """
+        sketchpad = self._get_public_sketchpad(public_id, signature)
+        if sketchpad.snapshot:
+            # The snapshot is a data URL or plain base64 written by the client.
+            # Its declared type is ignored: only actual PNG and JPEG images are
+            # served, so that it cannot be used to serve HTML or SVG.
+            try:
+                image = base64.b64decode(sketchpad.snapshot.rpartition(',')[2], validate=True)
+            except binascii.Error:
+                image = b''
+            content_type = guess_mimetype(image)
+            if content_type in PUBLIC_SNAPSHOT_MIMETYPES:
+                etag = hashlib.sha1(image).hexdigest()
+                return self._make_public_response(etag, image, content_type)
+        # no valid snapshot was saved by the client, render the strokes instead
+        version = sketchpad._get_strokes_version()
+        etag = hashlib.sha1(('%s-%s' % (sketchpad.id, version)).encode()).hexdigest()
+        if request.httprequest.if_none_match.contains(etag):
+            return self._make_public_response(etag, '', 'image/png')
+        image = sketchpad._get_public_image_payload(sketchpad.id, version)
+        return self._make_public_response(etag, image, 'image/png')
+
+    @http.route('/knowledge_canvas/sketchpad/export', type='http', auth='user')
+    def export_sketchpads(self, sketchpad_ids, export_format='png', **kw):
+        """This is the controller exporting sketchpads as files, rendered on
+        the server from their stroke history.
+
+        :param sketchpad_ids: comma separated ids of the sketchpads
+        :type sketchpad_ids: str
+        :param export_format: 'svg', 'png' or 'pdf'
+        :type export_format: str
+
+        :returns: the file for a single sketchpad, a zip archive otherwise
+        :rtype: http.Response
+        """
+        try:
+            ids = [int(sketchpad_id) for sketchpad_id in sketchpad_ids.split(',') if sketchpad_id]
+        except ValueError:
+            raise BadRequest()
+        sketchpads = request.env['knowledge_canvas.sketchpad'].browse(ids).exists()
+        if not sketchpads:
+            raise request.not_found()
+        if len(sketchpads) == 1:
+            content = sketchpads.export_sketchpad(export_format)
+            return request.make_response(content, headers=[
+                ('Content-Type', EXPORT_FORMATS[export_format]),
+                ('Content-Disposition', content_disposition(
+                    '%s.%s' % (sketchpads.sketchpad_seq_id or sketchpads.id, export_format))),
+            ])
+        archive = sketchpads.export_sketchpads_zip(export_format)
+        size = archive.seek(0, os.SEEK_END)
+        archive.seek(0)
+        # the archive is streamed from its temporary file, closed (and
+        # deleted) once the response is sent
+        return request.make_response(wrap_file(request.httprequest.environ, archive), headers=[
+            ('Content-Type', 'application/zip'),
+            ('Content-Length', size),
+            ('Content-Disposition', content_disposition('sketchpads.zip')),
+        ])
@@ -1,4 +1,7 @@
 from . import knowledge_article
+from . import knowledge_article_favorite
+from . import knowledge_article_member
 from . import knowledge_article_stage
 from . import sketchpad
+from . import sketchpad_export
 from . import sketchpad_stroke_history
@@ -3,16 +3,51 @@ import json
 from markupsafe import Markup
 from urllib import parse
 
-from odoo import api, models, fields, _
+from odoo import api, models, fields, tools, _
 from odoo.exceptions import ValidationError
 
 ARTICLE_PERMISSION_LEVEL = {'none': 0, 'read': 1, 'write': 2}
+# Fields of the articles sent to the sidebar
+SIDEBAR_ARTICLE_FIELDS = [
+    'name', 'icon', 'parent_id', 'category', 'is_locked', 'user_can_write',
+    'is_user_favorite', 'is_article_item', 'has_article_children',
+]
+# Fields whose changes alter the sidebar, see _bump_sidebar_version
+SIDEBAR_DEPENDENCIES = {
+    'name', 'icon', 'parent_id', 'category', 'is_locked', 'is_article_item',
+    'sequence', 'active', 'to_delete', 'internal_permission',
+    'is_article_visible_by_everyone', 'article_member_ids', 'favorite_ids',
+}
+# PostgreSQL sequence holding the version of the sidebar caches
+SIDEBAR_VERSION_SEQUENCE = 'knowledge_canvas_sidebar_version'
 
 
 class Article(models.Model):
     _inherit = ['knowledge.article']
 
-    sketchpad_ids = fields.One2many('knowledge_canvas.sketchpad', 'article_id', 'Sketchpads', required=True)
+    sketchpad_ids = fields.One2many('knowledge_canvas.sketchpad', 'article_id', 'Sketchpads')
+
+    def init(self):
+        super().init()
+        self.env.cr.execute("CREATE SEQUENCE IF NOT EXISTS %s" % SIDEBAR_VERSION_SEQUENCE)
+
+    # ------------------------------------------------------------
+    # CRUD
+    # ------------------------------------------------------------
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        self._bump_sidebar_version()
+        return super().create(vals_list)
+
+    def write(self, vals):
+        if SIDEBAR_DEPENDENCIES & vals.keys():
+            self._bump_sidebar_version()
+        return super().write(vals)
+
+    def unlink(self):
+        self._bump_sidebar_version()
+        return super().unlink()
 
     # ------------------------------------------------------------
     # HELPERS
@@ -73,18 +108,34 @@ class Article(models.Model):
     # ------------------------------------------------------------
 
     def create_default_item_stages(self):
-        """ Need to create stages if this article has no stage yet. """
-        stage_count = self.env['knowledge.article.stage'].search_count(
-            [('parent_id', '=', self.id)])
-        if not stage_count:
-            self.env['knowledge.article.stage'].create([{
-                "name": stage_name,
-                "sequence": sequence,
-                "parent_id": self.id,
-                "fold": fold
-            } for stage_name, sequence, fold in [
-                (_("New"), 0, False), (_("Ongoing"), 1, False), (_("Done"), 2, True)]
-            ])
+        """ Need to create stages for the articles that have no stage yet. This
+        is done for all the articles at once: one grouped count and one create. """
+        if not self:
+            return
+        stage_groups = self.env['knowledge.article.stage'].read_group(
+            [('parent_id', 'in', self.ids)], ['parent_id'], ['parent_id'])
+        articles_with_stages = {group['parent_id'][0] for group in stage_groups}
+        default_stages = self._get_default_item_stages_cached()
+        self.env['knowledge.article.stage'].create([{
+            "name": stage_name,
+            "sequence": sequence,
+            "parent_id": article_id,
+            "fold": fold
+        } for article_id in self.ids if article_id not in articles_with_stages
+          for stage_name, sequence, fold in default_stages
+        ])
+
+    @api.model
+    def _get_default_item_stages(self):
+        """ Returns the stages given to an article when its items are first
+        shown in a kanban view, as a list of (name, sequence, fold). Override
+        this method to provide a custom set of default stages. """
+        return [(_("New"), 0, False), (_("Ongoing"), 1, False), (_("Done"), 2, True)]
+
+    @api.model
+    @tools.ormcache('self.env.lang')
+    def _get_default_item_stages_cached(self):
+        return tuple(self._get_default_item_stages())
 
     def render_embedded_view_link(self, act_window_id_or_xml_id, view_type, name, view_context):
         """
@@ -98,13 +149,21 @@ class Article(models.Model):
         :return: rendered template for the view link
         """
         self.ensure_one()
+        return self._render_embedded_view_link(
+            act_window_id_or_xml_id, view_type, name,
+            json.dumps(view_context or {}, sort_keys=True))
+
+    # The renders only depend on their arguments, the user and the language.
+    # The cache is cleared by ir.actions and ir.ui.view on any change.
+    @tools.ormcache('self.env.uid', 'self.env.lang', 'act_window_id_or_xml_id', 'view_type', 'name', 'view_context_json')
+    def _render_embedded_view_link(self, act_window_id_or_xml_id, view_type, name, view_context_json):
         action_data = self._extract_act_window_data(act_window_id_or_xml_id, name)
         action_data.pop('help', None)
         return self.env['ir.qweb']._render(
             'knowledge.knowledge_view_link', {
                 'behavior_props': parse.quote(json.dumps({
                     'act_window': action_data,
-                    'context': view_context or {},
+                    'context': json.loads(view_context_json),
                     'name': name,
                     'view_type': view_type,
                 }), safe='()*!\'')
@@ -126,14 +185,22 @@ class Article(models.Model):
         :return: rendered template for embedded views
         """
         self.ensure_one()
+        return self._render_embedded_view(
+            act_window_id_or_xml_id, view_type, name,
+            json.dumps(view_context or {}, sort_keys=True),
+            json.dumps(additional_view_props or False, sort_keys=True))
+
+    @tools.ormcache('self.env.uid', 'self.env.lang', 'act_window_id_or_xml_id', 'view_type', 'name', 'view_context_json', 'additional_view_props_json')
+    def _render_embedded_view(self, act_window_id_or_xml_id, view_type, name, view_context_json, additional_view_props_json):
         action_data = self._extract_act_window_data(act_window_id_or_xml_id, name)
         action_help = action_data.pop('help', None)
         behavior_props = {
             'act_window': action_data,
-            'context': view_context or {},
+            'context': json.loads(view_context_json),
             'view_type': view_type,
         }
 
+        additional_view_props = json.loads(additional_view_props_json)
         if additional_view_props:
             behavior_props['additionalViewProps'] = additional_view_props
 
@@ -146,6 +213,32 @@ class Article(models.Model):
             raise_if_not_found=False
         )
 
+    def get_sketchpad_descriptors(self):
+        """ Returns a lightweight description of the sketchpads of the article,
+        enough to show them before their strokes are loaded: the strokes are
+        only fetched once a sketchpad is scrolled into view (see
+        knowledge_canvas.sketchpad.hydrate_sketchpad).
+
+        :return: list of dicts with the id, the thumbnail url (False if there
+            is no thumbnail yet) and the number of strokes of the sketchpads
+        """
+        self.ensure_one()
+        sketchpads = self.sketchpad_ids.with_context(bin_size=True)
+        History = self.env['knowledge_canvas.sketchpad_stroke_history']
+        stroke_counts = {
+            group['sketchpad_seq_id'][0]: group['sketchpad_seq_id_count']
+            for group in History.read_group(
+                [('sketchpad_seq_id', 'in', sketchpads.ids)], ['sketchpad_seq_id'], ['sketchpad_seq_id'])
+        }
+        pending_strokes = History._get_pending_strokes(sketchpads.ids)
+        return [{
+            'id': sketchpad.id,
+            'sketchpad_seq_id': sketchpad.sketchpad_seq_id,
+            'thumbnail_url': sketchpad.thumbnail and '/web/image/knowledge_canvas.sketchpad/%s/thumbnail?unique=%s' % (
+                sketchpad.id, fields.Datetime.to_string(sketchpad.write_date)),
+            'stroke_count': stroke_counts.get(sketchpad.id, 0) + len(pending_strokes.get(sketchpad.id, [])),
+        } for sketchpad in sketchpads]
+
     @api.model
     def get_empty_list_help(self, help_message):
         # Meant to target knowledge_article_action_trashed action only.
@@ -205,6 +298,69 @@ class Article(models.Model):
             - a child article of any unfolded article that is shown
         """
 
+        if unfolded_ids is False:
+            unfolded_ids = []
+        hidden_root_id = False
+
+        # Add active article and its parents in list of unfolded articles
+        if self.is_article_visible:
+            if self.parent_id:
+                unfolded_ids += self._get_ancestor_ids()
+        # If the current article is a hidden root article, show the article
+        elif not self.parent_id and self.id:
+            hidden_root_id = self.id
+
+        unfolded_ids = tuple(sorted(set(unfolded_ids)))
+        if self._is_sidebar_version_pending():
+            return self._compute_sidebar_data(unfolded_ids, hidden_root_id)
+        return self._get_sidebar_data(unfolded_ids, hidden_root_id, self._get_sidebar_version())
+
+    @api.model
+    def _bump_sidebar_version(self):
+        """ Change the version of the sidebar caches once the current
+        transaction is committed, as the sidebar of any user may change with
+        it. This is done after the commit so that no other transaction can
+        cache the sidebar as it was before, under the new version.
+        """
+        postcommit = self.env.cr.postcommit
+        if postcommit.data.get(SIDEBAR_VERSION_SEQUENCE):
+            return
+        postcommit.data[SIDEBAR_VERSION_SEQUENCE] = True
+        registry = self.env.registry
+
+        @postcommit.add
+        def bump():
+            with registry.cursor() as cr:
+                cr.execute("SELECT nextval(%s)", (SIDEBAR_VERSION_SEQUENCE,))
+
+    @api.model
+    def _is_sidebar_version_pending(self):
+        """ Whether the current transaction changed the sidebar, in which case
+        the caches do not hold its changes yet. """
+        return bool(self.env.cr.postcommit.data.get(SIDEBAR_VERSION_SEQUENCE))
+
+    @api.model
+    def _get_sidebar_version(self):
+        """ Returns the version of the sidebar caches. It is part of their
+        keys, so that outdated entries are never read again and are simply
+        evicted from the cache. Reading it is a single row lookup.
+        """
+        self.env.cr.execute("SELECT last_value FROM %s" % SIDEBAR_VERSION_SEQUENCE)
+        return self.env.cr.fetchone()[0]
+
+    @api.model
+    @tools.ormcache('self.env.uid', 'unfolded_ids', 'hidden_root_id', 'version')
+    def _get_sidebar_data(self, unfolded_ids, hidden_root_id, version):
+        """ Cached part of get_sidebar_articles.
+
+        :param tuple unfolded_ids: sorted ids of the unfolded articles
+        :param int hidden_root_id: hidden root article to show, if any
+        :param int version: see _get_sidebar_version
+        """
+        return self._compute_sidebar_data(unfolded_ids, hidden_root_id)
+
+    @api.model
+    def _compute_sidebar_data(self, unfolded_ids, hidden_root_id):
         # Fetch root article_ids as sudo, ACLs will be checked on next global call fetching 'all_visible_articles'
         # this helps avoiding 2 queries done for ACLs (and redundant with the global fetch)
         root_articles_ids = self.env['knowledge.article'].sudo().search(
@@ -217,24 +373,38 @@ class Article(models.Model):
         # Add favorite articles and items (they are root articles in the
         # favorite tree)
         root_articles_ids += favorite_articles_ids
+        if hidden_root_id:
+            root_articles_ids += [hidden_root_id]
 
-        if unfolded_ids is False:
-            unfolded_ids = []
-
-        # Add active article and its parents in list of unfolded articles
-        if self.is_article_visible:
-            if self.parent_id:
-                unfolded_ids += self._get_ancestor_ids()
-        # If the current article is a hidden root article, show the article
-        elif not self.parent_id and self.id:
-            root_articles_ids += [self.id]
-
-        all_visible_articles = self.get_visible_articles(root_articles_ids, unfolded_ids)
+        all_visible_articles = self.get_visible_articles(root_articles_ids, list(unfolded_ids))
 
         return {
             "articles": all_visible_articles.read(
-                ['name', 'icon', 'parent_id', 'category', 'is_locked', 'user_can_write', 'is_user_favorite', 'is_article_item', 'has_article_children'],
+                SIDEBAR_ARTICLE_FIELDS,
                 None,  # To not fetch the name of parent_id
             ),
             "favorite_ids": favorite_articles_ids,
         }
+
+    def get_sidebar_children(self):
+        """ Get the data used by the sidebar when unfolding this article, so
+        that unfolding a node does not reload the whole sidebar. It returns
+        the same information as get_sidebar_articles for the child articles
+        (not items) of this article.
+        """
+        self.ensure_one()
+        if self._is_sidebar_version_pending():
+            return self._compute_sidebar_children_data(self.id)
+        return self._get_sidebar_children_data(self.id, self._get_sidebar_version())
+
+    @api.model
+    @tools.ormcache('self.env.uid', 'article_id', 'version')
+    def _get_sidebar_children_data(self, article_id, version):
+        return self._compute_sidebar_children_data(article_id)
+
+    @api.model
+    def _compute_sidebar_children_data(self, article_id):
+        return self.env['knowledge.article'].search(
+            [('parent_id', '=', article_id), ('is_article_item', '=', False)],
+            order='sequence, id',
+        ).read(SIDEBAR_ARTICLE_FIELDS, None)
@@ -0,0 +1,21 @@
+from odoo import api, models
+
+
+class ArticleMember(models.Model):
+    _inherit = 'knowledge.article.member'
+
+    # Members change the articles a user can see and write in the sidebar,
+    # see knowledge.article._bump_sidebar_version
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        self.env['knowledge.article']._bump_sidebar_version()
+        return super().create(vals_list)
+
+    def write(self, vals):
+        self.env['knowledge.article']._bump_sidebar_version()
+        return super().write(vals)
+
+    def unlink(self):
+        self.env['knowledge.article']._bump_sidebar_version()
+        return super().unlink()
@@ -1,12 +1,39 @@
 # -*- coding: utf-8 -*-
 # Part of Odoo. See LICENSE file for full copyright and licensing details.
 
+import hashlib
+from collections import defaultdict
 from lxml import html
 from urllib import parse
 from odoo import api, fields, models, _
 from odoo.exceptions import ValidationError
+from odoo.tools.lru import LRU
 from odoo.tools.translate import html_translate
 
+# Only the bodies holding this attribute need to be post-processed
+BEHAVIOR_PROPS_ATTRIBUTE = "data-behavior-props"
+# Encoded bodies, by digest of the body they were encoded from
+_encoded_bodies = LRU(512)
+
+
+def _encode_behavior_props(body):
+    """ Encodes the behavior props of the embedded views of the given body.
+    The same bodies are loaded every time a template is created or updated
+    from the data files, so that the results are cached by digest of the body.
+    """
+    digest = hashlib.sha256(body.encode() if isinstance(body, str) else body).digest()
+    if digest not in _encoded_bodies:
+        _encoded_bodies[digest] = _encode_fragment(body)
+    return _encoded_bodies[digest]
+
+
+def _encode_fragment(body):
+    fragment = html.fragment_fromstring(body, create_parent=True)
+    for element in fragment.findall(".//*[@%s]" % BEHAVIOR_PROPS_ATTRIBUTE):
+        if 'o_knowledge_behavior_type_embedded_view' in (element.get("class") or ""):
+            element.set(BEHAVIOR_PROPS_ATTRIBUTE, parse.quote(element.get(BEHAVIOR_PROPS_ATTRIBUTE), safe='()*!\''))
+    return html.tostring(fragment)
+
 
 class ArticleTemplate(models.Model):
     """This model stores and renders article templates."""
@@ -67,9 +94,13 @@ class ArticleTemplate(models.Model):
         embedded views. This function makes the templates easily readable and
         editable from the XML files.
         """
+        processed_bodies = {
+            body: self._post_process_template_body(body)
+            for body in {vals["body"] for vals in vals_list if vals.get("body")}
+        }
         for vals in vals_list:
             if vals.get("body"):
-                vals["body"] = self._post_process_template_body(vals["body"])
+                vals["body"] = processed_bodies[vals["body"]]
         return super()._load_records_create(vals_list)
 
     def _load_records_write(self, vals):
@@ -82,11 +113,9 @@ class ArticleTemplate(models.Model):
         return super()._load_records_write(vals)
 
     def _post_process_template_body(self, body):
-        fragment = html.fragment_fromstring(body, create_parent=True)
-        for element in fragment.findall(".//*[@data-behavior-props]"):
-            if 'o_knowledge_behavior_type_embedded_view' in element.get("class"):
-                element.set("data-behavior-props", parse.quote(element.get("data-behavior-props"), safe='()*!\''))
-        return html.tostring(fragment)
+        if BEHAVIOR_PROPS_ATTRIBUTE not in body:
+            return body
+        return _encode_behavior_props(body)
 
     # Compute methods:
 
@@ -130,32 +159,68 @@ class ArticleTemplate(models.Model):
         self.ensure_one()
         article = self.env["knowledge.article"].browse(article_id)
         article.ensure_one()
+        self.apply_template_on_articles(article.ids)
+
+    def apply_template_on_articles(self, article_ids):
+        """
+        Applies the current template on all the given articles at once. The
+        child articles are created level by level: all the articles of a
+        same depth, for all the given articles, are created in a single call.
+        :param list article_ids: Article ids
+        """
+        self.ensure_one()
+        articles = self.env["knowledge.article"].browse(article_ids)
+        if not articles:
+            return
+
+        # Fetch the whole template hierarchy at once: reading a field on any
+        # template of the recordset prefetches it for all of them.
+        templates = self.search([("id", "child_of", self.id)])
+        child_templates = defaultdict(list)
+        for template in templates:
+            if template.parent_id:
+                child_templates[template.parent_id.id].append(template)
 
-        article.write({
+        articles.write({
             "article_properties": self.template_properties or {},
             "article_properties_definition": self.template_properties_definition,
             "body": self.body,
             "cover_image_id": self.cover_image_id.id,
             "icon": self.icon,
-            "name": article.name or self.name
         })
-
-        stack = [(article, self)]
-        while stack:
-            (parent_article, parent_template) = stack.pop()
-            if not parent_template.child_ids:
-                continue
-            articles = self.env["knowledge.article"].create([{
-                "article_properties": template.template_properties or {},
-                "article_properties_definition": template.template_properties_definition,
-                "body": template.body,
-                "cover_image_id": template.cover_image_id.id,
-                "icon": template.icon,
-                "is_article_item": template.is_template_item,
-                "name": template.name,
-                "parent_id": parent_article.id,
-            } for template in parent_template.child_ids])
-            stack.extend(zip(articles, parent_template.child_ids))
+        articles.filtered(lambda article: not article.name).write({"name": self.name})
+
+        level = [(article, self) for article in articles]
+        while level:
+            pairs = [
+                (parent_article, template)
+                for parent_article, parent_template in level
+                for template in child_templates[parent_template.id]
+            ]
+            if not pairs:
+                break
+            created_articles = self.env["knowledge.article"].create([
+                template._prepare_article_values(parent_article)
+                for parent_article, template in pairs
+            ])
+            level = list(zip(created_articles, [template for _parent, template in pairs]))
+
+    def _prepare_article_values(self, parent_article):
+        """
+        Returns the values used to create a child article from the current template
+        :param parent_article: knowledge.article under which the article is created
+        """
+        self.ensure_one()
+        return {
+            "article_properties": self.template_properties or {},
+            "article_properties_definition": self.template_properties_definition,
+            "body": self.body,
+            "cover_image_id": self.cover_image_id.id,
+            "icon": self.icon,
+            "is_article_item": self.is_template_item,
+            "name": self.name,
+            "parent_id": parent_article.id,
+        }
 
     def create_article(self):
         self.ensure_one()
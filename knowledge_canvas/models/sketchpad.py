@@ -1,6 +1,15 @@
+import json
 import uuid
 
-from odoo import api, models, fields
+from odoo import api, models, fields, tools
+
+# Maximum number of sketchpads whose strokes are loaded at the same time by
+# all the server workers, the clients are asked to retry later above that
+MAX_CONCURRENT_HYDRATIONS = 4
+# First key of the advisory locks used as hydration slots, the second one
+# being the number of the slot
+HYDRATION_LOCK_KEY = 74526
+
 
 class Sketchpad(models.Model):
     _name = 'knowledge_canvas.sketchpad'
@@ -10,16 +19,99 @@ class Sketchpad(models.Model):
     sketchpad_seq_id = fields.Char('Sketchpad Sequence ID', required=True, readonly=True, copy=False, index=True)
     snapshot = fields.Char('Snapshot')  # stores a base64 encoded image of the canvas
     # stroke_history = Json('Stroke History')
-    public_id = fields.Char('Public ID', compute='_compute_index', index=True)  # used to compute the public url of the sketchpad
+    public_id = fields.Char('Public ID', readonly=True, copy=False, index=True)  # used to compute the public url of the sketchpad
+    public_url = fields.Char('Public URL', compute='_compute_public_url')
+    # text written on the sketchpad, kept up to date when the strokes are synced to the database
+    text_content = fields.Text('Text Content', readonly=True, copy=False, index='trigram')
+    # rendered from the strokes when they are synced to the database, see _update_thumbnails
+    thumbnail = fields.Image('Thumbnail', readonly=True, copy=False, max_width=256, max_height=256)
+
+    _sql_constraints = [
+        ('public_id_unique', 'unique(public_id)', 'The public ID of a sketchpad must be unique.'),
+    ]
+
+    def init(self):
+        # sketchpads created before the public ID was stored
+        self.env.cr.execute("""
+            UPDATE knowledge_canvas_sketchpad
+               SET public_id = md5(random()::text || clock_timestamp()::text || id::text)
+             WHERE public_id IS NULL
+        """)
 
     @api.model_create_multi
     def create(self,vals_list):
         for vals in vals_list:
             if not vals.get('sketchpad_seq_id'):
                 vals['sketchpad_seq_id'] = self.env['ir.sequence'].next_by_code('knowledge_canvas.sketchpad_id')
+            vals['public_id'] = str(uuid.uuid4())
         return super().create(vals_list)
 
     # used to compute the public url of the sketchpad
-    def _compute_index(self):
-        for line in self:
-            line.index = uuid.uuid4()
+    @api.depends('public_id')
+    def _compute_public_url(self):
+        for sketchpad in self:
+            if sketchpad.public_id:
+                sketchpad.public_url = '/knowledge_canvas/sketchpad/%s/%s' % (
+                    sketchpad.public_id, sketchpad._get_public_signature())
+            else:
+                sketchpad.public_url = False
+
+    def hydrate_sketchpad(self):
+        """ Returns all the strokes of the sketchpad, the saved ones and the
+        pending ones. This method is called by the client once the sketchpad is
+        scrolled into view. As an article can hold many sketchpads, the number
+        of hydrations running at the same time is capped, the client is asked to
+        retry when the cap is reached. The cap holds across all the workers: a
+        hydration takes one of a few transaction-level advisory locks, released
+        with the transaction, and never waits for one. """
+        self.ensure_one()
+        self.check_access_rights('read')
+        self.check_access_rule('read')
+        for slot in range(MAX_CONCURRENT_HYDRATIONS):
+            self.env.cr.execute("SELECT pg_try_advisory_xact_lock(%s, %s)", (HYDRATION_LOCK_KEY, slot))
+            if self.env.cr.fetchone()[0]:
+                return {'strokes': self._get_strokes()}
+        return {'retry': True}
+
+    def _get_public_signature(self):
+        """ Signature of the public URL, so that knowing the public ID of a
+        sketchpad is not enough to access it. """
+        self.ensure_one()
+        return tools.hmac(self.env(su=True), 'knowledge_canvas-sketchpad-public', (self.id, self.public_id))
+
+    def _get_strokes(self):
+        """ Returns the strokes of the sketchpad in drawing order, each one
+        holding a ``deleted`` flag, including the strokes that are not saved
+        in the database yet. """
+        self.ensure_one()
+        history = self.env['knowledge_canvas.sketchpad_stroke_history'].sudo().search_read(
+            [('sketchpad_seq_id', '=', self.id)], ['stroke', 'deleted'], order='id')
+        strokes = [dict(line['stroke'], deleted=line['deleted']) for line in history]
+        pending = self.env['knowledge_canvas.sketchpad_stroke_history']._get_pending_strokes(self.ids)
+        return strokes + pending.get(self.id, [])
+
+    def _get_strokes_version(self):
+        """ Returns a value that changes whenever the strokes of the sketchpad
+        change, used to cache what is computed from them. """
+        self.ensure_one()
+        self.env['knowledge_canvas.sketchpad_stroke_history'].flush_model(['sketchpad_seq_id', 'deleted'])
+        self.env.cr.execute("""
+            SELECT COUNT(*), MAX(id), MAX(write_date)
+              FROM knowledge_canvas_sketchpad_stroke_history
+             WHERE sketchpad_seq_id = %s
+        """, (self.id,))
+        count, last_id, last_write = self.env.cr.fetchone()
+        pending = self.env['knowledge_canvas.sketchpad_stroke_history']._get_pending_strokes(self.ids)
+        return '%s-%s-%s-%s' % (count, last_id, last_write, len(pending.get(self.id, [])))
+
+    @api.model
+    @tools.ormcache('sketchpad_id', 'version')
+    def _get_public_strokes_payload(self, sketchpad_id, version):
+        """ Cached JSON payload of the strokes served to public viewers. As the
+        version is part of the key, outdated payloads are never served and
+        simply get evicted from the cache. """
+        strokes = self.browse(sketchpad_id)._get_strokes()
+        return json.dumps({
+            'sketchpad_id': sketchpad_id,
+            'strokes': [stroke for stroke in strokes if not stroke.get('deleted')],
+        })
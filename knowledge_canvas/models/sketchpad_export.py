@@ -0,0 +1,259 @@
+import base64
+import io
+import logging
+import re
+import tempfile
+import zipfile
+from xml.sax.saxutils import escape, quoteattr
+
+from PIL import Image, ImageDraw, ImageFont
+
+from odoo import api, models, tools, _
+from odoo.exceptions import UserError
+
+_logger = logging.getLogger(__name__)
+
+EXPORT_FORMATS = {
+    'svg': 'image/svg+xml',
+    'png': 'image/png',
+    'pdf': 'application/pdf',
+}
+# Default size of a sketchpad in the editor, the strokes are relative to it
+SKETCHPAD_WIDTH = 730
+SKETCHPAD_HEIGHT = 730
+DEFAULT_COLOR = '#000000'
+BACKGROUND_COLOR = '#ffffff'
+DEFAULT_LINE_WIDTH = 5
+THUMBNAIL_SIZE = 256
+HISTORY_FETCH_SIZE = 5000
+
+
+def _visible_strokes(strokes):
+    """ Yields the strokes that are visible on the sketchpad, in drawing
+    order, that is the ones that are not deleted and that were drawn after the
+    last clear of the sketchpad. """
+    visible = []
+    for stroke in strokes:
+        if stroke.get('deleted'):
+            continue
+        if stroke.get('action') == 'clear':
+            visible = []
+            continue
+        visible.append(stroke)
+    return visible
+
+
+def _get_size(strokes):
+    height = SKETCHPAD_HEIGHT
+    for stroke in strokes:
+        if stroke.get('action') == 'resize' and not stroke.get('deleted'):
+            height += (stroke.get('params') or {}).get('canvasHeight') or 0
+    return SKETCHPAD_WIDTH, height
+
+
+def _font_size(font):
+    match = re.match(r'\s*(\d+(?:\.\d+)?)px', font or '')
+    return float(match[1]) if match else 12.0
+
+
+def _decode_data_url(data_url):
+    _header, _sep, data = (data_url or '').rpartition(',')
+    return base64.b64decode(data) if data else b''
+
+
+def _render_svg(strokes):
+    width, height = _get_size(strokes)
+    output = io.StringIO()
+    output.write('<svg xmlns="http://www.w3.org/2000/svg" xmlns:xlink="http://www.w3.org/1999/xlink" '
+                 'width="%s" height="%s" viewBox="0 0 %s %s">' % (width, height, width, height))
+    output.write('<rect width="100%%" height="100%%" fill="%s"/>' % BACKGROUND_COLOR)
+    for stroke in _visible_strokes(strokes):
+        action = stroke.get('action')
+        params = stroke.get('params') or {}
+        color = quoteattr(params.get('strokeColor') or DEFAULT_COLOR)
+        line_width = params.get('lineWidth') or DEFAULT_LINE_WIDTH
+        initial = params.get('initialCoordinates') or {}
+        current = params.get('currentCoordinates') or {}
+        if action == 'template':
+            output.write('<image x="0" y="0" width="%s" height="%s" preserveAspectRatio="none" xlink:href=%s/>'
+                         % (width, height, quoteattr(params.get('imgSrc') or '')))
+        elif action == 'image':
+            output.write('<image x="%s" y="%s" width="%s" height="%s" preserveAspectRatio="none" xlink:href=%s/>' % (
+                initial.get('x', 0), initial.get('y', 0), params.get('width', 0), params.get('height', 0),
+                quoteattr(params.get('imgSrc') or '')))
+        elif action in ('line', 'line-freehand', 'erase-freehand'):
+            if action == 'erase-freehand':
+                color = quoteattr(BACKGROUND_COLOR)
+            output.write('<line x1="%s" y1="%s" x2="%s" y2="%s" stroke=%s stroke-width="%s" stroke-linecap="round"/>' % (
+                initial.get('x', 0) * width, initial.get('y', 0) * height,
+                current.get('x', 0) * width, current.get('y', 0) * height, color, line_width))
+        elif action == 'arc':
+            output.write('<circle cx="%s" cy="%s" r="%s" fill=%s/>' % (
+                initial.get('x', 0) * width, initial.get('y', 0) * height, params.get('radius', 0) * width, color))
+        elif action == 'point':
+            output.write('<circle cx="%s" cy="%s" r="%s" fill=%s/>' % (
+                current.get('x', 0) * width, current.get('y', 0) * height, line_width / 2, color))
+        elif action == 'fillRect':
+            x1, x2 = sorted((initial.get('x', 0) * width, current.get('x', 0) * width))
+            y1, y2 = sorted((initial.get('y', 0) * height, current.get('y', 0) * height))
+            output.write('<rect x="%s" y="%s" width="%s" height="%s" fill=%s/>' % (x1, y1, x2 - x1, y2 - y1, color))
+        elif action == 'text':
+            font = params.get('font') or ''
+            output.write('<text x="%s" y="%s" font-size="%s" font-family=%s fill=%s>%s</text>' % (
+                initial.get('x', 0) * width, initial.get('y', 0) * height, _font_size(font),
+                quoteattr(font.split(' ', 1)[1] if ' ' in font else 'Arial'), color,
+                escape(params.get('text') or '')))
+    output.write('</svg>')
+    return output.getvalue().encode()
+
+
+def _render_image(strokes):
+    width, height = _get_size(strokes)
+    image = Image.new('RGB', (width, height), BACKGROUND_COLOR)
+    draw = ImageDraw.Draw(image)
+    for stroke in _visible_strokes(strokes):
+        action = stroke.get('action')
+        params = stroke.get('params') or {}
+        color = params.get('strokeColor') or DEFAULT_COLOR
+        line_width = params.get('lineWidth') or DEFAULT_LINE_WIDTH
+        initial = params.get('initialCoordinates') or {}
+        current = params.get('currentCoordinates') or {}
+        try:
+            if action in ('template', 'image'):
+                picture = Image.open(io.BytesIO(_decode_data_url(params.get('imgSrc')))).convert('RGBA')
+                if action == 'template':
+                    box = (0, 0, width, height)
+                else:
+                    box = (int(initial.get('x', 0)), int(initial.get('y', 0)),
+                           int(initial.get('x', 0) + params.get('width', 0)), int(initial.get('y', 0) + params.get('height', 0)))
+                picture = picture.resize((max(box[2] - box[0], 1), max(box[3] - box[1], 1)))
+                image.paste(picture, box[:2], picture)
+            elif action in ('line', 'line-freehand', 'erase-freehand'):
+                if action == 'erase-freehand':
+                    color = BACKGROUND_COLOR
+                start = (initial.get('x', 0) * width, initial.get('y', 0) * height)
+                end = (current.get('x', 0) * width, current.get('y', 0) * height)
+                draw.line([start, end], fill=color, width=int(line_width))
+                # round caps
+                for x, y in (start, end):
+                    draw.ellipse([x - line_width / 2, y - line_width / 2, x + line_width / 2, y + line_width / 2], fill=color)
+            elif action in ('arc', 'point'):
+                if action == 'arc':
+                    x, y, radius = initial.get('x', 0) * width, initial.get('y', 0) * height, params.get('radius', 0) * width
+                else:
+                    x, y, radius = current.get('x', 0) * width, current.get('y', 0) * height, line_width / 2
+                draw.ellipse([x - radius, y - radius, x + radius, y + radius], fill=color)
+            elif action == 'fillRect':
+                x1, x2 = sorted((initial.get('x', 0) * width, current.get('x', 0) * width))
+                y1, y2 = sorted((initial.get('y', 0) * height, current.get('y', 0) * height))
+                draw.rectangle([x1, y1, x2, y2], fill=color)
+            elif action == 'text':
+                try:
+                    font = ImageFont.truetype('DejaVuSans.ttf', int(_font_size(params.get('font'))))
+                    anchor = 'ls'  # the canvas draws text from its baseline
+                except OSError:
+                    font, anchor = ImageFont.load_default(), None
+                draw.text((initial.get('x', 0) * width, initial.get('y', 0) * height),
+                          params.get('text') or '', fill=color, font=font, anchor=anchor)
+        except (ValueError, OSError):
+            # a broken stroke should not prevent exporting the rest of the sketchpad
+            _logger.warning("Could not render a %s stroke of a sketchpad", action)
+    return image
+
+
+def render_strokes(strokes, export_format):
+    """ Renders the strokes of a sketchpad, as stored by the client.
+
+    :param list strokes: stroke dicts, in drawing order
+    :param str export_format: one of EXPORT_FORMATS
+    :returns: the rendered file
+    :rtype: bytes
+    """
+    if export_format == 'svg':
+        return _render_svg(strokes)
+    output = io.BytesIO()
+    _render_image(strokes).save(output, format=export_format.upper())
+    return output.getvalue()
+
+
+class SketchpadExport(models.Model):
+    _inherit = 'knowledge_canvas.sketchpad'
+
+    def _iter_history_strokes(self):
+        """ Yields the persisted strokes of the sketchpad in drawing order,
+        fetching the history by chunks. """
+        self.ensure_one()
+        History = self.env['knowledge_canvas.sketchpad_stroke_history']
+        last_id = 0
+        while True:
+            lines = History.search_read(
+                [('sketchpad_seq_id', '=', self.id), ('id', '>', last_id)],
+                ['stroke', 'deleted'], order='id', limit=HISTORY_FETCH_SIZE)
+            for line in lines:
+                yield dict(line['stroke'], deleted=line['deleted'])
+            if len(lines) < HISTORY_FETCH_SIZE:
+                return
+            last_id = lines[-1]['id']
+
+    def _get_export_strokes(self):
+        self.ensure_one()
+        pending = self.env['knowledge_canvas.sketchpad_stroke_history']._get_pending_strokes(self.ids)
+        return list(self._iter_history_strokes()) + pending.get(self.id, [])
+
+    def export_sketchpad(self, export_format='png'):
+        """ Renders this sketchpad on the server.
+
+        :param str export_format: 'svg', 'png' or 'pdf'
+        :returns: the rendered file
+        :rtype: bytes
+        """
+        self.ensure_one()
+        self._check_export_format(export_format)
+        return render_strokes(self._get_export_strokes(), export_format)
+
+    def export_sketchpads_zip(self, export_format='png'):
+        """ Renders these sketchpads and packs them in a zip archive. The
+        sketchpads are read, rendered and written to the archive one at a
+        time, and the archive is built in a temporary file, so that only one
+        sketchpad is held in memory at once.
+
+        :param str export_format: 'svg', 'png' or 'pdf'
+        :returns: the zip archive, a temporary file positioned at its start
+            and deleted when closed
+        """
+        self._check_export_format(export_format)
+        self.check_access_rights('read')
+        self.check_access_rule('read')
+        History = self.env['knowledge_canvas.sketchpad_stroke_history']
+        output = tempfile.TemporaryFile()
+        with zipfile.ZipFile(output, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+            for sketchpad in self:
+                archive.writestr(
+                    '%s.%s' % (sketchpad.sketchpad_seq_id or sketchpad.id, export_format),
+                    render_strokes(sketchpad._get_export_strokes(), export_format))
+                # do not keep the strokes of every sketchpad in the cache
+                History.invalidate_model(['stroke'])
+        output.seek(0)
+        return output
+
+    def _update_thumbnails(self):
+        """ Renders the thumbnails of these sketchpads from their strokes, so
+        that they can be shown before their strokes are loaded. """
+        for sketchpad in self.sudo():
+            image = _render_image(sketchpad._get_export_strokes())
+            image.thumbnail((THUMBNAIL_SIZE, THUMBNAIL_SIZE))
+            output = io.BytesIO()
+            image.save(output, format='PNG')
+            sketchpad.thumbnail = base64.b64encode(output.getvalue())
+
+    @api.model
+    @tools.ormcache('sketchpad_id', 'version')
+    def _get_public_image_payload(self, sketchpad_id, version):
+        """ Cached PNG rendering served to public viewers, see
+        _get_public_strokes_payload for the version. """
+        return render_strokes(self.browse(sketchpad_id).sudo()._get_export_strokes(), 'png')
+
+    @api.model
+    def _check_export_format(self, export_format):
+        if export_format not in EXPORT_FORMATS:
+            raise UserError(_("Sketchpads cannot be exported as %s.", export_format))
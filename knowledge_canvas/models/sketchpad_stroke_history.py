@@ -1,18 +1,25 @@
 from collections import defaultdict
-from copy import copy
 import json
+import logging
+
+from psycopg2.extras import execute_values
 
 from odoo import api, models, fields
 
 """
-Global Variables shouldn't be used. This is purely written here for the sake of the PoC. Ideally we would want to use a fast key-value storage
-database here such as Redis to cache all incoming strokes. This helps up to avoid the overhead of 10 database queries per second while a user
-is drawing. This cache stores all strokes that have been made during a session and it flushes all strokes to the database in one go after
-batching them up to perform only a single database request for multiple previous strokes.
+Incoming strokes are not written to the stroke history one by one: this would mean around 10 ORM writes per second
+while a user is drawing. They are appended to a journal instead, an UNLOGGED table that costs a single cheap INSERT
+per call, and they are flushed to the history in one go once enough of them are batched up. Unlike the in-memory cache
+it replaces, the journal survives worker restarts (OOM or time limit kills included) and is shared between workers.
+Pending strokes left by a dead worker are replayed into the history when a registry is loaded. Note that PostgreSQL
+empties UNLOGGED tables after a crash of the database server itself.
 """
+_logger = logging.getLogger(__name__)
+
 MAX_STROKE_HISTORY = 2500
-stroke_cache = defaultdict(list)
-strokes_cache_len = 0
+STROKE_JOURNAL_TABLE = 'knowledge_canvas_stroke_journal'
+# Actions that can change the text shown on a sketchpad
+TEXT_INDEX_ACTIONS = ('text', 'clear', 'deleteOne', 'deleteMany')
 
 
 class Json(fields.Field):
@@ -34,46 +41,76 @@ class SketchpadStrokesCollaboration(models.AbstractModel):
     _stroke_length = 0
 
     def publish_sketchpad_stroke_actions(self, sketchpad_id, stroke_actions):
-        """ Publishes the stroke actions to the bus and caches them. This method is called
+        """ Publishes the stroke actions to the bus and journals them. This method is called
         by the client when a user draws on the sketchpad. If there is any stroke that involves
-        deletion or if the cache exceeds MAX_STROKE_HISTORY, then the cache is flushed to the database.
+        deletion or if the journal exceeds MAX_STROKE_HISTORY, then the journal is flushed to the database.
         """
-        global strokes_cache_len
-        global stroke_cache
         channel = f'knowledge_canvas_sketchpad_stroke_{sketchpad_id}'
-        stroke_cache[sketchpad_id] += stroke_actions
+        if stroke_actions:
+            execute_values(self.env.cr._obj, f"""
+                INSERT INTO {STROKE_JOURNAL_TABLE} (sketchpad_id, stroke) VALUES %s
+            """, [(sketchpad_id, json.dumps(stroke)) for stroke in stroke_actions])
         message = {'stroke_actions': stroke_actions, 'sketchpad_id': sketchpad_id}
         self.env['bus.bus']._sendone(channel, 'update_canvas', message)
-        strokes_cache_len += len(stroke_actions)
         has_deletion = False
         for stroke in stroke_actions:
             if stroke['action'] == 'deleteOne' or stroke['action'] == 'deleteMany':
                 has_deletion = True
                 break
-        if strokes_cache_len > MAX_STROKE_HISTORY or has_deletion:
+        if has_deletion or self._get_journal_size() > MAX_STROKE_HISTORY:
             self.sync_cache_to_database()
 
+    @api.model
+    def _get_journal_size(self):
+        """ Returns the number of strokes in the journal, journaled by any worker,
+        counting no further than MAX_STROKE_HISTORY + 1 so that it stays cheap. """
+        self.env.cr.execute(f"""
+            SELECT count(*) FROM (SELECT 1 FROM {STROKE_JOURNAL_TABLE} LIMIT %s) journal
+        """, (MAX_STROKE_HISTORY + 1,))
+        return self.env.cr.fetchone()[0]
+
     def join_sketchpad_session(self, sketchpad_id):
         """ Join the current user to the sketchpad session. This method is called by
-        the client and it returns the cached strokes for a sketchpad
+        the client and it returns the journaled strokes for a sketchpad
         """
-        global stroke_cache
-        global strokes_cache_len
         self.ensure_one()
         return {
-            'strokes': stroke_cache[sketchpad_id],
+            'strokes': self._get_pending_strokes([sketchpad_id]).get(sketchpad_id, []),
         }
 
+    @api.model
+    def _get_pending_strokes(self, sketchpad_ids):
+        """ Returns the strokes of the given sketchpads that are not synced to
+        the database yet, as a dict {sketchpad_id: [strokes]}. """
+        self.env.cr.execute(f"""
+            SELECT sketchpad_id, stroke
+              FROM {STROKE_JOURNAL_TABLE}
+             WHERE sketchpad_id = ANY(%s)
+          ORDER BY id
+        """, (list(sketchpad_ids),))
+        pending = defaultdict(list)
+        for sketchpad_id, stroke in self.env.cr.fetchall():
+            pending[sketchpad_id].append(stroke)
+        return dict(pending)
+
     @api.model
     def sync_cache_to_database(self):
-        """ Syncs the cache to the database. This method is called when the cache exceeds
+        """ Syncs the journal to the database. This method is called when the journal exceeds
         MAX_STROKE_HISTORY or during deletions and in cases where a user closes the window. """
-        global strokes_cache_len
-        global stroke_cache
-        # copies the cache. This is important because we are going to clear the cache so it shouldnt clear any incoming data
-        values_to_sync = copy(stroke_cache)
-        strokes_cache_len = 0
-        stroke_cache.clear()
+        # Deleting the rows takes them from the journal atomically: concurrent syncs of other
+        # workers never get the same strokes, and strokes journaled meanwhile are kept for the next sync.
+        self.env.cr.execute(f"DELETE FROM {STROKE_JOURNAL_TABLE} RETURNING id, sketchpad_id, stroke")
+        values_to_sync = defaultdict(list)
+        for _id, sketchpad_id, stroke in sorted(self.env.cr.fetchall()):
+            values_to_sync[sketchpad_id].append(stroke)
+        # the strokes of sketchpads deleted in the meantime are dropped
+        existing_ids = set(self.env['knowledge_canvas.sketchpad'].browse(list(values_to_sync)).exists().ids)
+        values_to_sync = {key: value for key, value in values_to_sync.items() if key in existing_ids}
+        # only the sketchpads whose visible text may have changed need to be indexed again
+        text_sketchpad_ids = [
+            sketchpad_id for sketchpad_id, strokes in values_to_sync.items()
+            if any(stroke['action'] in TEXT_INDEX_ACTIONS for stroke in strokes)
+        ]
         for sketchpad_id, _ in values_to_sync.items():
             strokes_to_add = []
             deleted_indexes = []
@@ -119,7 +156,7 @@ class SketchpadStrokesCollaboration(models.AbstractModel):
                 # psycopg2 automatically sanitizes the input value, preventing SQL injection.
                 self.env.cr.execute("""
                     UPDATE knowledge_canvas_sketchpad_stroke_history
-                    SET deleted = NOT deleted
+                    SET deleted = NOT deleted, write_date = (now() at time zone 'UTC')
                     WHERE user_identifier = %s
                     AND local_stroke_id >= %s
                     AND local_stroke_id <= %s
@@ -127,6 +164,32 @@ class SketchpadStrokesCollaboration(models.AbstractModel):
                 """, (undo_indexes[3][2], undo_indexes[1][2], undo_indexes[2][2], sketchpad_id)) # possibly use ORM to do this when it supports
             if restore_indexes:
                 self.env['knowledge_canvas.sketchpad_stroke_history'].search(restore_indexes).write({'deleted': False})
+        if text_sketchpad_ids:
+            self._update_sketchpad_text_content(text_sketchpad_ids)
+        self.env['knowledge_canvas.sketchpad'].browse(list(values_to_sync))._update_thumbnails()
+
+    @api.model
+    def _update_sketchpad_text_content(self, sketchpad_ids):
+        """ Extracts the text visible on the given sketchpads, that is the text
+        strokes that are not deleted and were written after the last clear, to
+        make the sketchpads searchable. """
+        self.flush_model(['stroke', 'deleted'])
+        self.env.cr.execute("""
+            SELECT sketchpad_seq_id, stroke->>'action', stroke->'params'->>'text'
+              FROM knowledge_canvas_sketchpad_stroke_history
+             WHERE sketchpad_seq_id = ANY(%s)
+               AND deleted IS NOT TRUE
+               AND stroke->>'action' IN ('text', 'clear')
+          ORDER BY id
+        """, (list(sketchpad_ids),))
+        texts = {sketchpad_id: [] for sketchpad_id in sketchpad_ids}
+        for sketchpad_id, action, text in self.env.cr.fetchall():
+            if action == 'clear':
+                texts[sketchpad_id] = []
+            elif text:
+                texts[sketchpad_id].append(text)
+        for sketchpad in self.env['knowledge_canvas.sketchpad'].browse(sketchpad_ids).sudo():
+            sketchpad.text_content = '\n'.join(texts[sketchpad.id]) or False
 
 
 class SketchpadStrokeHistory(models.Model):
@@ -135,8 +198,31 @@ class SketchpadStrokeHistory(models.Model):
     _description = 'Model that stores data related to individual strokes and metadata for keeping track of the history'
     _inherit = ['knowledge_canvas.collaborative_strokes.mixin']
 
-    sketchpad_seq_id = fields.Many2one('knowledge_canvas.sketchpad', 'Sketchpad Sequence ID', ondelete='cascade', required=True)
+    sketchpad_seq_id = fields.Many2one('knowledge_canvas.sketchpad', 'Sketchpad Sequence ID', ondelete='cascade', required=True, index=True)
     stroke = Json('Stroke History')
     deleted = fields.Boolean('Deleted', default=False)
     user_identifier = fields.Integer('User Identifier', index=True)
     local_stroke_id = fields.Integer('Local Stroke ID', index=True)
+
+    def init(self):
+        self.env.cr.execute(f"""
+            CREATE UNLOGGED TABLE IF NOT EXISTS {STROKE_JOURNAL_TABLE} (
+                id bigserial PRIMARY KEY,
+                sketchpad_id integer NOT NULL,
+                stroke json NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS {STROKE_JOURNAL_TABLE}_sketchpad_id_index
+                ON {STROKE_JOURNAL_TABLE} (sketchpad_id, id);
+        """)
+
+    def _register_hook(self):
+        """ Replays the strokes journaled by workers that were stopped before
+        they could sync them to the database. """
+        super()._register_hook()
+        self.env.cr.execute("SELECT to_regclass(%s)", (STROKE_JOURNAL_TABLE,))
+        if self.env.cr.fetchone()[0]:
+            try:
+                with self.env.cr.savepoint():
+                    self.sync_cache_to_database()
+            except Exception:
+                _logger.exception("Could not replay the sketchpad stroke journal")
@@ -10,6 +10,8 @@
         'security/ir.model.access.csv',
         'security/security_view.xml',
         'data/element_id_data.xml',
+        'data/canvas_id_data.xml',
+        'data/element_tile_data.xml',
         'data/sketchpad_data.xml',
         'views/app_view.xml',
         'views/menu_view.xml',
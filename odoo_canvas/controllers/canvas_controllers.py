@@ -1,4 +1,8 @@
+import base64
+import gzip
+
 from odoo import http
+from odoo.http import request, STATIC_CACHE
 
 class OdooCanvas(http.Controller):
     @http.route('/canvas', auth='public', website=True, sitemap=True)
@@ -15,18 +19,136 @@ class OdooCanvas(http.Controller):
 
 
     @http.route('/canvas/<string:canvas_id>', auth='public', website=True, sitemap=False)
-    def get_odoo_canvas_page(self, page_id=None, **kw):
+    def get_odoo_canvas_page(self, canvas_id=None, **kw):
         """This is the controller for the canvas page.
-        It renders an owl template with the collaborative canvas.
+        It renders an owl template with the collaborative canvas. The page
+        itself does not read the canvas: its content is fetched by the client
+        from the /canvas/<canvas_id>/data route.
 
-        :param page_id: the id of the canvas page
-        :type page_id: int
+        :param canvas_id: the canvas ID, of the form cnv-<intid>
+        :type canvas_id: str
         :param kw: keyword arguments
 
         :returns: rendered canvas_page template
         :rtype: http.Response
         """
 
-
         # render an owl template
-        return http.request.render('odoo_canvas.canvas_page', {})
+        return http.request.render('odoo_canvas.canvas_page', {'canvas_id': canvas_id})
+
+    @http.route('/canvas/<string:canvas_id>/data', type='http', auth='user', sitemap=False)
+    def get_odoo_canvas_page_data(self, canvas_id, **kw):
+        """This is the controller for the data of a canvas page.
+        It returns the metadata and content of the canvas as gzip compressed
+        JSON and supports conditional requests.
+
+        :param canvas_id: the canvas ID, of the form cnv-<intid>
+        :type canvas_id: str
+        :param kw: keyword arguments
+
+        :returns: the canvas data as JSON
+        :rtype: http.Response
+        """
+        payload = request.env['odoo.canvas']._get_canvas_page_payload(canvas_id)
+        if not payload:
+            raise request.not_found()
+        etag, body = payload
+        headers = [
+            ('Cache-Control', 'private, no-cache'),
+            ('Vary', 'Accept-Encoding'),
+        ]
+        if request.httprequest.if_none_match.contains(etag):
+            response = request.make_response('', headers=headers, status=304)
+        else:
+            if 'gzip' in request.httprequest.accept_encodings:
+                headers.append(('Content-Encoding', 'gzip'))
+            else:
+                body = gzip.decompress(body)
+            headers.append(('Content-Type', 'application/json'))
+            response = request.make_response(body, headers=headers)
+        response.set_etag(etag)
+        return response
+
+
+    def _get_image_cache_control(self, unique):
+        """Returns the Cache-Control header of the images of the elements,
+        which are private. As in /web/image, they are only cached for long
+        when the URL changes with the image, they are revalidated with their
+        ETag otherwise.
+        """
+        if unique:
+            return 'private, max-age=%s, immutable' % STATIC_CACHE
+        return 'private, no-cache'
+
+    @http.route([
+        '/canvas/object/<int:object_id>/image',
+        '/canvas/object/<int:object_id>/image/<int:size>',
+    ], type='http', auth='user')
+    def get_canvas_object_image(self, object_id, size=0, unique=False, **kw):
+        """Serve the image of a canvas element at the resolution that best
+        fits the requested size.
+
+        :param object_id: the id of the odoo_canvas.object
+        :type object_id: int
+        :param size: the size in pixels the image is displayed at, 0 for the
+            full image
+        :type size: int
+        :param unique: checksum or write date of the element; when given the
+            response is cached as immutable by the browser
+
+        :returns: the image, with ETag and Last-Modified headers
+        :rtype: http.Response
+        """
+        element = request.env['odoo_canvas.object'].browse(object_id).exists()
+        if not element:
+            raise request.not_found()
+        stream = request.env['ir.binary']._get_image_stream_from(
+            element, element._get_image_field_for_size(size))
+        response = stream.get_response()
+        response.headers['Cache-Control'] = self._get_image_cache_control(unique)
+        return response
+
+    @http.route('/canvas/object/<int:object_id>/tile/<int:size>/<int:col>/<int:row>', type='http', auth='user')
+    def get_canvas_object_image_tile(self, object_id, size, col, row, unique=False, **kw):
+        """Serve one tile of the image of a canvas element, from the tiles
+        cut out of the variant that best fits the requested size when the
+        image was stored.
+
+        :param object_id: the id of the odoo_canvas.object
+        :type object_id: int
+        :param size: the size in pixels the whole image is displayed at
+        :type size: int
+        :param col: column of the tile
+        :type col: int
+        :param row: row of the tile
+        :type row: int
+        :param unique: checksum or write date of the element; when given the
+            response is cached as immutable by the browser
+
+        :returns: the tile, with ETag and Last-Modified headers
+        :rtype: http.Response
+        """
+        element = request.env['odoo_canvas.object'].browse(object_id).exists()
+        if not element:
+            raise request.not_found()
+        image_field = element._get_image_field_for_size(size)
+        # also checks the read access to the element
+        stream = request.env['ir.binary']._get_image_stream_from(element, image_field)
+        etag = '%s-%s-%s' % (stream.etag, col, row)
+        headers = [('Cache-Control', self._get_image_cache_control(unique))]
+        if request.httprequest.if_none_match.contains(etag):
+            response = request.make_response('', headers=headers, status=304)
+        else:
+            tile = request.env['odoo_canvas.object.tile'].sudo().search([
+                ('object_id', '=', element.id),
+                ('image_field', '=', image_field),
+                ('col', '=', col),
+                ('row', '=', row),
+            ], limit=1)
+            if not tile:
+                raise request.not_found()
+            headers.append(('Content-Type', tile.mimetype))
+            response = request.make_response(base64.b64decode(tile.data), headers=headers)
+        response.set_etag(etag)
+        response.last_modified = stream.last_modified
+        return response
@@ -1,2 +1,7 @@
 from . import canvas_base
-from . import page_elements
\ No newline at end of file
+from . import page_elements
+from . import page_elements_import
+from . import page_elements_layout
+from . import page_elements_tile
+from . import page_elements_traversal
+from . import ir_sequence
\ No newline at end of file
@@ -1,5 +1,10 @@
-from odoo import api, _, models, fields
+import gzip
+import hashlib
+import json
+
+from odoo import api, _, models, fields, tools
 from odoo.exceptions import UserError
+from odoo.tools.sql import column_exists
 
 class OdooCanvas(models.Model):
     _name = 'odoo.canvas'
@@ -12,14 +17,60 @@ class OdooCanvas(models.Model):
     content = fields.Char()
 
     # This is the canvas ID, which will be a string of the for cnv-<intid>
-    canvas_id = fields.Char(string='Canvas ID')
+    canvas_id = fields.Char(string='Canvas ID', readonly=True, copy=False, index=True)
+
+    _sql_constraints = [
+        ('canvas_id_unique', 'unique(canvas_id)', 'The canvas ID must be unique.'),
+    ]
+
+    def _auto_init(self):
+        # The IDs computed by counting the canvases were given twice once a
+        # canvas had been deleted: renumber the duplicates before the unique
+        # constraint is added, or PostgreSQL refuses to create it.
+        if column_exists(self.env.cr, self._table, 'canvas_id'):
+            self.env.cr.execute(r"""
+                WITH duplicates AS (
+                    SELECT id, row_number() OVER (ORDER BY id) AS position
+                      FROM (
+                            SELECT id, row_number() OVER (PARTITION BY canvas_id ORDER BY id) AS rank
+                              FROM odoo_canvas
+                             WHERE canvas_id IS NOT NULL
+                           ) ranked
+                     WHERE rank > 1
+                )
+                UPDATE odoo_canvas canvas
+                   SET canvas_id = 'cnv-' || (last.number + duplicates.position)
+                  FROM duplicates, (
+                        SELECT COALESCE(MAX(substring(canvas_id FROM '^cnv-(\d+)$')::integer), 0) AS number
+                          FROM odoo_canvas
+                       ) last
+                 WHERE canvas.id = duplicates.id
+            """)
+        return super()._auto_init()
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        # the IDs of the whole batch are reserved from the sequence in one query
+        canvas_ids = self.env['ir.sequence'].next_batch_by_code('odoo.canvas', len(vals_list))
+        for vals, canvas_id in zip(vals_list, canvas_ids):
+            vals['canvas_id'] = canvas_id
+        return super(OdooCanvas, self).create(vals_list)
 
     @api.model
-    def create(self, vals):
-        total_canvases = self.search_count([]) or 0
-        vals['canvas_id'] = "cnv-%s" % (total_canvases + 1)
-        return super(OdooCanvas, self).create(vals)
-    
+    def _init_canvas_id_sequence(self):
+        """ Make sure the canvas ID sequence does not hand out IDs that were
+        already given when they were computed by counting the canvases. """
+        sequence = self.env.ref('odoo_canvas.sequence_canvas_id', raise_if_not_found=False)
+        if not sequence:
+            return
+        self.env.cr.execute(r"""
+            SELECT MAX(substring(canvas_id FROM '^cnv-(\d+)$')::integer)
+              FROM odoo_canvas
+        """)
+        last_number = self.env.cr.fetchone()[0] or 0
+        if sequence.number_next_actual <= last_number:
+            sequence.sudo().number_next = last_number + 1
+
 
     # The compute function for the canvas_id
     # Initial attempt - decided to override create instead
@@ -47,13 +98,48 @@ class OdooCanvas(models.Model):
             'target': 'self',
         }
 
+    @api.model
+    def _get_canvas_page_payload(self, canvas_id):
+        """ Build the data served by the /canvas/<canvas_id>/data route.
+
+        :param str canvas_id: the canvas ID, of the form cnv-<intid>
+
+        :returns: a tuple (etag, gzip compressed JSON body), or None if there
+            is no such canvas
+        """
+        canvas = self.search([('canvas_id', '=', canvas_id)], limit=1)
+        if not canvas:
+            return None
+        etag = hashlib.sha1(('%s-%s' % (canvas.id, canvas.write_date)).encode()).hexdigest()
+        return etag, canvas._get_canvas_page_body(etag)
+
+    @tools.ormcache('etag')
+    def _get_canvas_page_body(self, etag):
+        """ Gzip compressed JSON body of the canvas. The etag changes on every
+        write of the canvas, so that outdated bodies are never served again.
+
+        :param str etag: the etag of the canvas, see _get_canvas_page_payload
+        """
+        self.ensure_one()
+        last_modified = self.last_modified or self.date_created
+        data = {
+            'id': self.id,
+            'canvas_id': self.canvas_id,
+            'name': self.name,
+            'author': [self.author.id, self.author.sudo().name] if self.author else False,
+            'date_created': fields.Datetime.to_string(self.date_created),
+            'last_modified': fields.Datetime.to_string(last_modified),
+            'content': self.content or False,
+        }
+        return gzip.compress(json.dumps(data).encode())
+
 
 class CanvasObjectWizard(models.TransientModel):
     _name = 'odoo_canvas.object.wizard'
     _description = 'Canvas Object Wizard'
 
     name = fields.Char(string='Object Name', index=True)
-    content_image = fields.Binary(string='Image Content')
+    content_image = fields.Image(string='Image Content', max_width=4096, max_height=4096)
     content_text = fields.Text(string='Text Content')
     content_type = fields.Selection(selection=[
         ('image/png', 'PNG'),
@@ -0,0 +1,55 @@
+from odoo import api, models
+
+
+class IrSequence(models.Model):
+    _inherit = 'ir.sequence'
+
+    def _next_batch(self, count):
+        """ Reserve ``count`` numbers of the sequence at once. Standard
+        sequences fetch all of them from PostgreSQL in a single query and
+        no-gap sequences are moved forward by a single update.
+
+        :param int count: number of values to reserve
+        :returns: the formatted values, in increasing order
+        :rtype: list
+        """
+        self.ensure_one()
+        if count <= 0:
+            return []
+        if self.use_date_range:
+            return [self._next() for _ in range(count)]
+        if self.implementation == 'standard':
+            self.env.cr.execute(
+                "SELECT nextval('ir_sequence_%03d') FROM generate_series(1, %%s)" % self.id, (count,))
+            numbers = sorted(row[0] for row in self.env.cr.fetchall())
+        else:
+            step = self.number_increment * count
+            self.env.cr.execute("""
+                UPDATE ir_sequence
+                   SET number_next = number_next + %s
+                 WHERE id = %s
+             RETURNING number_next - %s
+            """, (step, self.id, step))
+            first = self.env.cr.fetchone()[0]
+            self.invalidate_recordset(['number_next'])
+            numbers = [first + i * self.number_increment for i in range(count)]
+        return [self.get_next_char(number) for number in numbers]
+
+    @api.model
+    def next_batch_by_code(self, sequence_code, count):
+        """ Same as next_by_code, but reserves ``count`` values at once.
+
+        :param str sequence_code: code of the sequence
+        :param int count: number of values to reserve
+        :returns: the formatted values, or a list of False if no sequence with
+            this code exists
+        :rtype: list
+        """
+        self.check_access_rights('read')
+        company_id = self.env.company.id
+        sequence = self.search([
+            ('code', '=', sequence_code), ('company_id', 'in', [company_id, False])
+        ], order='company_id', limit=1)
+        if not sequence:
+            return [False] * count
+        return sequence._next_batch(count)
@@ -1,12 +1,36 @@
+from psycopg2.extras import execute_values
+
 from odoo import models, fields, api
 
+# Columns sent to the client for each element of a canvas graph, in this order.
+# Binary contents are left out on purpose: they are fetched lazily per element.
+GRAPH_NODE_FIELDS = [
+    'id', 'parent_id', 'element_id', 'name', 'content_type', 'content_text',
+    'pos_x', 'pos_y', 'pos_z', 'dim_x', 'dim_y',
+]
+GRAPH_NODE_COLUMNS = ', '.join('element.%s' % fname for fname in GRAPH_NODE_FIELDS)
+
+# Bounding box of an element, as indexed by the GiST (R-tree) index created in
+# init(). Queries must use the exact same expression for the index to be used.
+ELEMENT_BBOX_SQL = (
+    "box(point(COALESCE(%(t)spos_x, 0), COALESCE(%(t)spos_y, 0)),"
+    " point(COALESCE(%(t)spos_x, 0) + COALESCE(%(t)sdim_x, 0),"
+    " COALESCE(%(t)spos_y, 0) + COALESCE(%(t)sdim_y, 0)))"
+)
+
+# Downscaled variants of content_image, smallest first. The client picks the
+# first one that is at least as large as the element at the current zoom level.
+IMAGE_PYRAMID_SIZES = [128, 256, 512, 1024]
+IMAGE_TILE_SIZE = 256
+
+
 class PageElements(models.Model):
     _name = "odoo_canvas.object"
     _description = "Object for elements in each page"
 
     element_id = fields.Char(required=True, string="Element ID", 
         default='CO0000', copy=False, readonly=True)
-    name = fields.Char("Object Name")
+    name = fields.Char("Object Name", index='trigram')
     parent_id = fields.Many2one(string="Parent", comodel_name="odoo_canvas.object")
     child_id = fields.One2many('odoo_canvas.object', 'parent_id')
 
@@ -27,13 +51,27 @@ class PageElements(models.Model):
         ('mind_map', 'Mind Map'),
     ], default='text', index=True, string = 'Content Type')
 
-    content_image = fields.Binary(string='Image Content')
-    content_text = fields.Text(string='Text Content')
+    content_image = fields.Image(string='Image Content', max_width=4096, max_height=4096)
+    content_image_1024 = fields.Image("Image 1024", related="content_image", max_width=1024, max_height=1024, store=True)
+    content_image_512 = fields.Image("Image 512", related="content_image", max_width=512, max_height=512, store=True)
+    content_image_256 = fields.Image("Image 256", related="content_image", max_width=256, max_height=256, store=True)
+    content_image_128 = fields.Image("Image 128", related="content_image", max_width=128, max_height=128, store=True)
+    content_text = fields.Text(string='Text Content', index='trigram')
+
+    def init(self):
+        # R-tree over the bounding boxes of the elements, kept up to date by
+        # PostgreSQL on every create and write of the positions/dimensions.
+        self.env.cr.execute(
+            "CREATE INDEX IF NOT EXISTS odoo_canvas_object_bbox_index"
+            " ON odoo_canvas_object USING gist ((%s))" % (ELEMENT_BBOX_SQL % {'t': ''})
+        )
 
     @api.model_create_multi
     def create(self,vals_list):
-        for vals in vals_list:
-            vals['element_id'] = self.env['ir.sequence'].next_by_code('element.id')
+        # the element IDs of the whole batch are reserved in a single query
+        element_ids = self.env['ir.sequence'].next_batch_by_code('element.id', len(vals_list))
+        for vals, element_id in zip(vals_list, element_ids):
+            vals['element_id'] = element_id
         return super().create(vals_list)
 
     def action_open_new_canvas_wizard(self):
@@ -45,4 +83,162 @@ class PageElements(models.Model):
             # set default values here or allow the wizard to handle it
             'context': {},
             'target': 'new', 
-        }
\ No newline at end of file
+        }
+
+    def _write_columns_bulk(self, fnames, rows):
+        """ Write plain column values on many elements with a single UPDATE,
+        bypassing the ORM. The write access to every element is checked, then
+        the cache of the given fields is invalidated.
+
+        :param list fnames: names of the stored fields to write
+        :param list rows: tuples ``(id, value, ...)`` with one value per field
+        """
+        if not rows:
+            return
+        self.check_access_rights('write')
+        self.browse([row[0] for row in rows]).check_access_rule('write')
+        self.flush_model(fnames)
+        query = """
+            UPDATE odoo_canvas_object AS element
+               SET {assignments}, write_uid = {uid}, write_date = (now() at time zone 'UTC')
+              FROM (VALUES %s) AS data(id, {fnames})
+             WHERE element.id = data.id
+        """.format(
+            assignments=', '.join('%s = data.%s' % (fname, fname) for fname in fnames),
+            uid=int(self.env.uid),
+            fnames=', '.join(fnames),
+        )
+        execute_values(self.env.cr._obj, query, rows, page_size=1000)
+        self.invalidate_model(fnames + ['write_uid', 'write_date'])
+
+    def get_graph(self):
+        """ Load the whole subtree rooted at this element, along with the links
+        of every element of the subtree, in a single recursive query.
+
+        The payload is kept flat and compact so that large mind maps can be
+        sent in one round-trip: every node is a list of values ordered as in
+        ``fields`` and every link is an ``[object_id, link_id]`` pair.
+
+        :returns: dict with the keys ``root``, ``fields``, ``nodes`` and ``links``
+        :rtype: dict
+        """
+        self.ensure_one()
+        self.check_access_rights('read')
+        self.flush_model(GRAPH_NODE_FIELDS[1:] + ['linked_elements'])
+        self.env.cr.execute("""
+            WITH RECURSIVE subtree AS (
+                SELECT id FROM odoo_canvas_object WHERE id = %(root_id)s
+                 UNION
+                SELECT child.id
+                  FROM odoo_canvas_object child
+                  JOIN subtree ON child.parent_id = subtree.id
+            )
+            SELECT {columns}, COALESCE(links.link_ids, '{{}}')
+              FROM subtree
+              JOIN odoo_canvas_object element ON element.id = subtree.id
+         LEFT JOIN (
+                    SELECT object_id, array_agg(link_id ORDER BY link_id) AS link_ids
+                      FROM odoo_canvas_object_link_rel
+                     WHERE object_id IN (SELECT id FROM subtree)
+                  GROUP BY object_id
+                   ) links ON links.object_id = element.id
+          ORDER BY element.id
+        """.format(columns=GRAPH_NODE_COLUMNS), {'root_id': self.id})
+        nodes = []
+        links = []
+        for row in self.env.cr.fetchall():
+            nodes.append(list(row[:-1]))
+            links.extend([row[0], link_id] for link_id in row[-1])
+        return {
+            'root': self.id,
+            'fields': GRAPH_NODE_FIELDS,
+            'nodes': nodes,
+            'links': links,
+        }
+
+    @api.model
+    def get_elements_in_viewport(self, x_min, y_min, x_max, y_max, root_id=False, limit=None):
+        """ Return the elements whose bounding box intersects the given viewport,
+        ordered by ``pos_z`` so that the client can paint them in order.
+
+        :param float x_min: left edge of the viewport
+        :param float y_min: top edge of the viewport
+        :param float x_max: right edge of the viewport
+        :param float y_max: bottom edge of the viewport
+        :param int root_id: if set, only look into the subtree of this element
+        :param int limit: maximum number of elements to return
+
+        :returns: dict with the keys ``fields`` and ``nodes``, see get_graph()
+        :rtype: dict
+        """
+        self.check_access_rights('read')
+        self.flush_model(GRAPH_NODE_FIELDS[1:])
+        params = {
+            'x_min': min(x_min, x_max), 'y_min': min(y_min, y_max),
+            'x_max': max(x_min, x_max), 'y_max': max(y_min, y_max),
+            'root_id': root_id, 'limit': limit,
+        }
+        subtree_query = ""
+        subtree_filter = ""
+        if root_id:
+            subtree_query = """
+                WITH RECURSIVE subtree AS (
+                    SELECT id FROM odoo_canvas_object WHERE id = %(root_id)s
+                     UNION
+                    SELECT child.id
+                      FROM odoo_canvas_object child
+                      JOIN subtree ON child.parent_id = subtree.id
+                )"""
+            subtree_filter = "AND element.id IN (SELECT id FROM subtree)"
+        self.env.cr.execute("""
+            {subtree_query}
+            SELECT {columns}
+              FROM odoo_canvas_object element
+             WHERE {bbox} && box(point(%(x_min)s, %(y_min)s), point(%(x_max)s, %(y_max)s))
+                   {subtree_filter}
+          ORDER BY element.pos_z, element.id
+             LIMIT %(limit)s
+        """.format(
+            subtree_query=subtree_query,
+            columns=GRAPH_NODE_COLUMNS,
+            bbox=ELEMENT_BBOX_SQL % {'t': 'element.'},
+            subtree_filter=subtree_filter,
+        ), params)
+        return {
+            'fields': GRAPH_NODE_FIELDS,
+            'nodes': [list(row) for row in self.env.cr.fetchall()],
+        }
+
+    @api.model
+    def _get_image_field_for_size(self, size):
+        """ Return the name of the smallest image variant that is at least
+        ``size`` pixels large, or the full image if none is large enough.
+
+        :param int size: requested size in pixels, 0 for the full image
+        :rtype: str
+        """
+        if size:
+            for pyramid_size in IMAGE_PYRAMID_SIZES:
+                if pyramid_size >= size:
+                    return 'content_image_%s' % pyramid_size
+        return 'content_image'
+
+    @api.model
+    def search_elements_by_text(self, text, limit=80):
+        """ Return the elements whose name or text content contains the given
+        text. Both are covered by trigram indexes, kept up to date by
+        PostgreSQL on every write, so that the search stays fast on large
+        canvases.
+
+        :param str text: the text to look for
+        :param int limit: maximum number of elements to return
+
+        :returns: dict with the keys ``fields`` and ``nodes``, see get_graph()
+        :rtype: dict
+        """
+        elements = self.search(['|', ('name', 'ilike', text), ('content_text', 'ilike', text)], limit=limit)
+        values = elements.read(GRAPH_NODE_FIELDS[1:], load=None)
+        return {
+            'fields': GRAPH_NODE_FIELDS,
+            'nodes': [[element[fname] for fname in GRAPH_NODE_FIELDS] for element in values],
+        }
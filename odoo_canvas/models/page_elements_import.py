@@ -0,0 +1,147 @@
+import csv
+import io
+import json
+
+from psycopg2.extras import execute_values
+
+from odoo import api, models, _
+from odoo.exceptions import UserError
+from odoo.tools import split_every
+
+IMPORT_BATCH_SIZE = 1000
+# Fields of odoo_canvas.object that can be set from an imported node
+IMPORT_NODE_FIELDS = ['name', 'content_type', 'content_text', 'pos_x', 'pos_y', 'pos_z', 'dim_x', 'dim_y']
+IMPORT_FLOAT_FIELDS = ['pos_x', 'pos_y', 'pos_z', 'dim_x', 'dim_y']
+
+
+class PageElementsImport(models.Model):
+    _inherit = 'odoo_canvas.object'
+
+    @api.model
+    def import_graph(self, nodes, parent_id=False, batch_size=IMPORT_BATCH_SIZE):
+        """ Import a whole graph of elements, typically a mind map coming from
+        another tool.
+
+        Every node is a dict holding a ``ref`` that identifies it inside the
+        imported data, an optional ``parent`` ref, an optional list of
+        ``links`` refs and any of the IMPORT_NODE_FIELDS. The nodes are consumed
+        in batches: each batch is created in one go, then the parent and link
+        references that can be resolved are written with bulk queries.
+        References to nodes of later batches are resolved once those exist.
+
+        :param nodes: iterable of dicts, it is only iterated once
+        :param int parent_id: parent of the nodes that have no ``parent``
+        :param int batch_size: number of nodes created at once
+
+        :returns: mapping of the refs to the ids of the created elements
+        :rtype: dict
+        """
+        ref_to_id = {}
+        pending_parents = []  # (element id, parent ref)
+        pending_links = []  # (element id, linked ref)
+        for batch in split_every(batch_size, nodes, list):
+            vals_list = []
+            for node in batch:
+                vals = {fname: node[fname] for fname in IMPORT_NODE_FIELDS if fname in node}
+                if not node.get('parent'):
+                    vals['parent_id'] = parent_id
+                vals_list.append(vals)
+            elements = self.create(vals_list)
+
+            for node, element_id in zip(batch, elements.ids):
+                ref = self._get_import_ref(node)
+                if ref in ref_to_id:
+                    raise UserError(_("The reference %s is used by several imported elements.", ref))
+                ref_to_id[ref] = element_id
+                if node.get('parent'):
+                    pending_parents.append((element_id, str(node['parent'])))
+                pending_links.extend((element_id, str(link_ref)) for link_ref in node.get('links') or [])
+
+            pending_parents = self._import_resolve_parents(pending_parents, ref_to_id)
+            pending_links = self._import_resolve_links(pending_links, ref_to_id)
+
+        unresolved = {ref for _element_id, ref in pending_parents + pending_links}
+        if unresolved:
+            raise UserError(_("Some imported elements refer to unknown references: %s",
+                              ", ".join(sorted(unresolved))))
+        return ref_to_id
+
+    @api.model
+    def import_graph_json(self, data, parent_id=False):
+        """ Import a graph from JSON, either a list of nodes or an object with
+        a ``nodes`` key. See import_graph() for the format of the nodes.
+
+        :param str data: the JSON document
+        :param int parent_id: parent of the root nodes
+        :returns: mapping of the refs to the ids of the created elements
+        :rtype: dict
+        """
+        payload = json.loads(data)
+        nodes = payload.get('nodes', []) if isinstance(payload, dict) else payload
+        return self.import_graph(nodes, parent_id=parent_id)
+
+    @api.model
+    def import_graph_csv(self, data, parent_id=False):
+        """ Import a graph from CSV. The header gives the columns: ``ref``,
+        ``parent``, ``links`` (space separated refs) and any of the
+        IMPORT_NODE_FIELDS. The rows are streamed to import_graph().
+
+        :param str data: the CSV document
+        :param int parent_id: parent of the root nodes
+        :returns: mapping of the refs to the ids of the created elements
+        :rtype: dict
+        """
+        reader = csv.DictReader(io.StringIO(data))
+        return self.import_graph((self._parse_import_csv_row(row) for row in reader), parent_id=parent_id)
+
+    @api.model
+    def _parse_import_csv_row(self, row):
+        node = {fname: value for fname, value in row.items() if value not in (None, '')}
+        for fname in IMPORT_FLOAT_FIELDS:
+            if fname in node:
+                node[fname] = float(node[fname])
+        if 'links' in node:
+            node['links'] = node['links'].split()
+        return node
+
+    @api.model
+    def _get_import_ref(self, node):
+        if node.get('ref') in (None, False, ''):
+            raise UserError(_("Every imported element needs a reference."))
+        return str(node['ref'])
+
+    @api.model
+    def _import_resolve_parents(self, pending_parents, ref_to_id):
+        """ Write the parents that can be resolved and return the others. """
+        resolved = []
+        remaining = []
+        for element_id, parent_ref in pending_parents:
+            if parent_ref in ref_to_id:
+                resolved.append((element_id, ref_to_id[parent_ref]))
+            else:
+                remaining.append((element_id, parent_ref))
+        self._write_columns_bulk(['parent_id'], resolved)
+        if resolved:
+            self.invalidate_model(['child_id'])
+        return remaining
+
+    @api.model
+    def _import_resolve_links(self, pending_links, ref_to_id):
+        """ Insert the links that can be resolved and return the others. """
+        resolved = []
+        remaining = []
+        for element_id, link_ref in pending_links:
+            if link_ref in ref_to_id:
+                resolved.append((element_id, ref_to_id[link_ref]))
+            else:
+                remaining.append((element_id, link_ref))
+        if resolved:
+            self.flush_model(['linked_elements'])
+            execute_values(self.env.cr._obj, """
+                INSERT INTO odoo_canvas_object_link_rel (object_id, link_id)
+                     VALUES %s
+                ON CONFLICT DO NOTHING
+            """, resolved, page_size=1000)
+            self.invalidate_model(['linked_elements'])
+            self.browse(list({element_id for element_id, _link_id in resolved}))._bump_canvas_versions()
+        return remaining
@@ -0,0 +1,179 @@
+import logging
+
+from odoo import models, _
+from odoo.exceptions import UserError
+
+_logger = logging.getLogger(__name__)
+
+try:
+    import numpy as np
+except ImportError:
+    _logger.warning("The numpy python library is not installed, canvas auto-layout will not be available.")
+    np = None
+
+LAYOUT_MARGIN = 40.0
+LAYOUT_MIN_LEVEL_GAP = 160.0
+LAYOUT_MIN_SIBLING_GAP = 60.0
+# The force-directed layout is quadratic in the number of nodes
+FORCE_LAYOUT_MAX_NODES = 2000
+FORCE_LAYOUT_ITERATIONS = 100
+# Positions that move less than this are not written back
+LAYOUT_TOLERANCE = 0.5
+
+
+def _get_levels(parent_idx):
+    """ Split the nodes in levels, the first one only holding the root(s).
+
+    :param parent_idx: index of the parent of each node, -1 for the roots
+    :returns: list of arrays of node indexes
+    """
+    levels = [np.flatnonzero(parent_idx < 0)]
+    seen = np.zeros(len(parent_idx), dtype=bool)
+    seen[levels[0]] = True
+    while True:
+        is_child = np.isin(parent_idx, levels[-1]) & ~seen
+        level = np.flatnonzero(is_child)
+        if not len(level):
+            return levels
+        seen[level] = True
+        levels.append(level)
+
+
+def _tree_layout(parent_idx, sibling_key, level_gap, sibling_gap):
+    """ Compute a tidy left-to-right tree layout: every leaf gets its own
+    slot and every parent is centered on the slots of its descendants.
+
+    :param parent_idx: index of the parent of each node, -1 for the roots
+    :param sibling_key: order of the siblings of a same parent
+    :returns: two arrays with the x and y coordinates of the nodes
+    """
+    levels = _get_levels(parent_idx)
+    depth = np.zeros(len(parent_idx))
+    width = np.zeros(len(parent_idx))
+    for level_depth, level in enumerate(levels):
+        depth[level] = level_depth
+
+    # bottom-up: a node is as wide as all its leaves
+    for level in reversed(levels):
+        width[level] = np.maximum(width[level], 1)
+        parents = parent_idx[level]
+        has_parent = parents >= 0
+        np.add.at(width, parents[has_parent], width[level][has_parent])
+
+    # top-down: the siblings are stacked in the slots of their parent
+    start = np.zeros(len(parent_idx))
+    start[levels[0]] = np.concatenate([[0], np.cumsum(width[levels[0]])[:-1]])
+    for level in levels[1:]:
+        level = level[np.lexsort((sibling_key[level], parent_idx[level]))]
+        parents = parent_idx[level]
+        before = np.cumsum(width[level]) - width[level]
+        group_start = np.concatenate([[True], parents[1:] != parents[:-1]])
+        group_index = np.cumsum(group_start) - 1
+        start[level] = start[parents] + before - before[group_start][group_index]
+
+    return depth * level_gap, (start + width / 2) * sibling_gap
+
+
+def _force_layout(pos, edges, fixed, ideal_length, iterations=FORCE_LAYOUT_ITERATIONS):
+    """ Refine positions with a Fruchterman-Reingold force-directed layout.
+
+    :param pos: (n, 2) array with the initial positions
+    :param edges: (m, 2) array with the node indexes of the edges
+    :param fixed: boolean mask of the nodes that must not move
+    :param float ideal_length: ideal distance between two connected nodes
+    :returns: (n, 2) array with the new positions
+    """
+    pos = pos.astype(float)
+    temperature = ideal_length * np.sqrt(len(pos))
+    cooling = temperature / (iterations + 1)
+    for _iteration in range(iterations):
+        delta = pos[:, None, :] - pos[None, :, :]
+        distance = np.maximum(np.linalg.norm(delta, axis=-1), 0.01)
+        # every pair of nodes repulses each other
+        displacement = np.einsum('ijk,ij->ik', delta, ideal_length ** 2 / distance ** 2)
+        # connected nodes attract each other
+        if len(edges):
+            edge_delta = pos[edges[:, 0]] - pos[edges[:, 1]]
+            edge_distance = np.maximum(np.linalg.norm(edge_delta, axis=-1), 0.01)
+            attraction = edge_delta * (edge_distance / ideal_length)[:, None]
+            np.add.at(displacement, edges[:, 0], -attraction)
+            np.add.at(displacement, edges[:, 1], attraction)
+        length = np.maximum(np.linalg.norm(displacement, axis=-1), 0.01)
+        step = displacement * (np.minimum(length, temperature) / length)[:, None]
+        step[fixed] = 0
+        pos += step
+        temperature -= cooling
+    return pos
+
+
+class PageElementsLayout(models.Model):
+    _inherit = 'odoo_canvas.object'
+
+    def layout_subtree(self, algorithm='tree'):
+        """ Compute the positions of the elements below each of these
+        elements, typically the nodes of a mind map. Each given element keeps
+        its position and only its subtree is moved, so that a branch can be
+        laid out again without touching the rest of the canvas. The changed
+        positions of all the subtrees are written with a single update.
+
+        :param str algorithm: ``tree`` for a tidy tree layout, ``force`` for a
+            force-directed layout seeded with the tree layout
+        :returns: number of elements that were moved
+        :rtype: int
+        """
+        if np is None:
+            raise UserError(_("The numpy python library is required to lay out canvas elements."))
+        if algorithm not in ('tree', 'force'):
+            raise UserError(_("Unknown layout algorithm: %s", algorithm))
+        self.check_access_rights('write')
+        rows = []
+        for element in self:
+            rows.extend(element._compute_subtree_layout(algorithm))
+        self._write_columns_bulk(['pos_x', 'pos_y'], rows)
+        return len(rows)
+
+    def _compute_subtree_layout(self, algorithm):
+        """ :returns: list of ``(id, pos_x, pos_y)`` for the moved elements """
+        self.ensure_one()
+        graph = self.get_graph()
+        if len(graph['nodes']) < 2:
+            return []
+        columns = {fname: index for index, fname in enumerate(graph['fields'])}
+        nodes = graph['nodes']
+        ids = np.array([node[columns['id']] for node in nodes])
+        id_to_index = {element_id: index for index, element_id in enumerate(ids.tolist())}
+        parent_idx = np.array([
+            -1 if node[columns['id']] == self.id else id_to_index.get(node[columns['parent_id']], -1)
+            for node in nodes
+        ])
+
+        def column(fname):
+            return np.array([node[columns[fname]] or 0.0 for node in nodes], dtype=float)
+
+        pos_x, pos_y = column('pos_x'), column('pos_y')
+        level_gap = max(column('dim_x').max() + LAYOUT_MARGIN, LAYOUT_MIN_LEVEL_GAP)
+        sibling_gap = max(column('dim_y').max() + LAYOUT_MARGIN, LAYOUT_MIN_SIBLING_GAP)
+        new_x, new_y = _tree_layout(parent_idx, pos_y, level_gap, sibling_gap)
+
+        root = id_to_index[self.id]
+        if algorithm == 'force':
+            if len(nodes) > FORCE_LAYOUT_MAX_NODES:
+                raise UserError(_("The force-directed layout is limited to %s elements.", FORCE_LAYOUT_MAX_NODES))
+            edges = [(index, parent) for index, parent in enumerate(parent_idx.tolist()) if parent >= 0]
+            edges += [
+                (id_to_index[source], id_to_index[target])
+                for source, target in graph['links']
+                if source in id_to_index and target in id_to_index and source != target
+            ]
+            fixed = np.zeros(len(nodes), dtype=bool)
+            fixed[root] = True
+            new_pos = _force_layout(
+                np.column_stack([new_x, new_y]), np.array(edges, dtype=int).reshape(-1, 2),
+                fixed, min(level_gap, sibling_gap))
+            new_x, new_y = new_pos[:, 0], new_pos[:, 1]
+
+        # keep the root element where it is
+        new_x += pos_x[root] - new_x[root]
+        new_y += pos_y[root] - new_y[root]
+        moved = (np.abs(new_x - pos_x) > LAYOUT_TOLERANCE) | (np.abs(new_y - pos_y) > LAYOUT_TOLERANCE)
+        return list(zip(ids[moved].tolist(), new_x[moved].tolist(), new_y[moved].tolist()))
@@ -0,0 +1,102 @@
+import base64
+import io
+
+from PIL import Image
+
+from odoo import api, fields, models
+
+from .page_elements import IMAGE_PYRAMID_SIZES, IMAGE_TILE_SIZE
+
+# Image fields of odoo_canvas.object that are cut into tiles, smallest first
+TILED_IMAGE_FIELDS = ['content_image_%s' % size for size in IMAGE_PYRAMID_SIZES] + ['content_image']
+
+
+class PageElementTile(models.Model):
+    _name = 'odoo_canvas.object.tile'
+    _description = 'Tile of the image of a canvas element'
+
+    object_id = fields.Many2one('odoo_canvas.object', required=True, ondelete='cascade')
+    image_field = fields.Char(required=True)
+    col = fields.Integer(required=True)
+    row = fields.Integer(required=True)
+    mimetype = fields.Char(required=True)
+    data = fields.Binary(attachment=False, required=True)
+
+    _sql_constraints = [
+        ('tile_unique', 'unique(object_id, image_field, col, row)', 'A tile can only be stored once.'),
+    ]
+
+
+class PageElementsTile(models.Model):
+    _inherit = 'odoo_canvas.object'
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        elements = super().create(vals_list)
+        elements.filtered('content_image')._generate_image_tiles()
+        return elements
+
+    def write(self, vals):
+        res = super().write(vals)
+        if 'content_image' in vals:
+            self._generate_image_tiles()
+        return res
+
+    def _generate_image_tiles(self):
+        """ Cut the image of these elements and each of its downscaled variants
+        into tiles, replacing the previous ones. This is done once, when the
+        image is stored, so that serving a tile never decodes the image.
+        """
+        Tile = self.env['odoo_canvas.object.tile'].sudo()
+        Tile.search([('object_id', 'in', self.ids)]).unlink()
+        tile_vals_list = []
+        for element in self.sudo().with_context(bin_size=False):
+            for fname in TILED_IMAGE_FIELDS:
+                if not element[fname]:
+                    continue
+                tile_vals_list.extend(
+                    dict(tile_vals, object_id=element.id, image_field=fname)
+                    for tile_vals in self._cut_image_tiles(base64.b64decode(element[fname]))
+                )
+        Tile.create(tile_vals_list)
+
+    @api.model
+    def _cut_image_tiles(self, image_data):
+        """ Cut an image into square tiles of IMAGE_TILE_SIZE pixels, the last
+        column and row being smaller if the size of the image is not a multiple
+        of it.
+
+        :param bytes image_data: raw image (PNG or JPEG)
+        :returns: list of dicts with the col, row, mimetype and data of the tiles
+        """
+        image = Image.open(io.BytesIO(image_data))
+        image_format = image.format or 'PNG'
+        mimetype = Image.MIME.get(image_format, 'image/png')
+        tiles = []
+        for top in range(0, image.height, IMAGE_TILE_SIZE):
+            for left in range(0, image.width, IMAGE_TILE_SIZE):
+                tile = image.crop((
+                    left, top,
+                    min(left + IMAGE_TILE_SIZE, image.width),
+                    min(top + IMAGE_TILE_SIZE, image.height),
+                ))
+                output = io.BytesIO()
+                tile.save(output, format=image_format)
+                tiles.append({
+                    'col': left // IMAGE_TILE_SIZE,
+                    'row': top // IMAGE_TILE_SIZE,
+                    'mimetype': mimetype,
+                    'data': base64.b64encode(output.getvalue()),
+                })
+        return tiles
+
+    @api.model
+    def _generate_missing_image_tiles(self):
+        """ Generate the tiles of the images stored before tiles existed. """
+        tiled_ids = [
+            group['object_id'][0]
+            for group in self.env['odoo_canvas.object.tile'].sudo().read_group([], ['object_id'], ['object_id'])
+        ]
+        self.sudo().search([
+            ('content_image', '!=', False), ('id', 'not in', tiled_ids),
+        ])._generate_image_tiles()
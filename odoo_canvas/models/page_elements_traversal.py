@@ -0,0 +1,236 @@
+from array import array
+from bisect import bisect_left
+from collections import deque
+
+from odoo import api, fields, models, tools
+
+# Fields whose changes alter the graph formed by the elements
+GRAPH_FIELDS = {'parent_id', 'linked_elements'}
+
+
+class CanvasAdjacency:
+    """ Undirected adjacency of the elements of a canvas, stored in compressed
+    sparse row arrays: the neighbours of the node at index ``i`` are
+    ``neighbours[offsets[i]:offsets[i + 1]]``. Tree edges (parent/child) and
+    links are kept apart so that traversals can ignore the tree.
+    """
+    __slots__ = ('ids', 'tree_offsets', 'tree_neighbours', 'link_offsets', 'link_neighbours')
+
+    def __init__(self, ids, tree_edges, link_edges):
+        self.ids = array('q', ids)
+        self.tree_offsets, self.tree_neighbours = self._to_csr(len(ids), tree_edges)
+        self.link_offsets, self.link_neighbours = self._to_csr(len(ids), link_edges)
+
+    @staticmethod
+    def _to_csr(size, edges):
+        degrees = [0] * (size + 1)
+        for source, target in edges:
+            degrees[source + 1] += 1
+            degrees[target + 1] += 1
+        for index in range(size):
+            degrees[index + 1] += degrees[index]
+        offsets = array('l', degrees)
+        neighbours = array('l', bytes(offsets[-1] * offsets.itemsize))
+        fill = list(offsets[:-1])
+        for source, target in edges:
+            neighbours[fill[source]] = target
+            fill[source] += 1
+            neighbours[fill[target]] = source
+            fill[target] += 1
+        return offsets, neighbours
+
+    def index(self, element_id):
+        index = bisect_left(self.ids, element_id)
+        if index < len(self.ids) and self.ids[index] == element_id:
+            return index
+        return None
+
+    def neighbours(self, index, include_tree=True):
+        yield from self.link_neighbours[self.link_offsets[index]:self.link_offsets[index + 1]]
+        if include_tree:
+            yield from self.tree_neighbours[self.tree_offsets[index]:self.tree_offsets[index + 1]]
+
+    def bfs(self, start, include_tree=True, max_depth=None):
+        """ :returns: dict mapping the reached indexes to their predecessor """
+        predecessors = {start: None}
+        queue = deque([(start, 0)])
+        while queue:
+            index, depth = queue.popleft()
+            if max_depth is not None and depth >= max_depth:
+                continue
+            for neighbour in self.neighbours(index, include_tree):
+                if neighbour not in predecessors:
+                    predecessors[neighbour] = index
+                    queue.append((neighbour, depth + 1))
+        return predecessors
+
+
+class PageElementsTraversal(models.Model):
+    _inherit = 'odoo_canvas.object'
+
+    # Only meaningful on the root elements: bumped whenever the graph of their
+    # canvas changes, see _bump_canvas_versions
+    graph_version = fields.Integer(readonly=True, copy=False, default=0)
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        elements = super().create(vals_list)
+        if any(GRAPH_FIELDS & vals.keys() for vals in vals_list):
+            elements._bump_canvas_versions()
+        return elements
+
+    def write(self, vals):
+        if 'parent_id' in vals:
+            # the elements leave their canvas
+            self._bump_canvas_versions()
+        res = super().write(vals)
+        if GRAPH_FIELDS & vals.keys():
+            self._bump_canvas_versions()
+        return res
+
+    def unlink(self):
+        # the children become the roots of their own canvases
+        (self | self.child_id)._bump_canvas_versions()
+        return super().unlink()
+
+    def _write_columns_bulk(self, fnames, rows):
+        if 'parent_id' not in fnames or not rows:
+            return super()._write_columns_bulk(fnames, rows)
+        moved = self.browse([row[0] for row in rows])
+        moved._bump_canvas_versions()
+        super()._write_columns_bulk(fnames, rows)
+        moved._bump_canvas_versions()
+
+    def _bump_canvas_versions(self):
+        """ Increment the graph version of the canvases of these elements, and
+        of these elements themselves as they may be, or become, the roots of
+        their own canvases. A single row per canvas is updated, so that reading
+        the version of a canvas stays cheap whatever its size. """
+        if not self.ids:
+            return
+        self.flush_model(['parent_id', 'graph_version'])
+        self.env.cr.execute("""
+            WITH RECURSIVE ancestors AS (
+                SELECT id, parent_id FROM odoo_canvas_object WHERE id = ANY(%(ids)s)
+                 UNION
+                SELECT parent.id, parent.parent_id
+                  FROM odoo_canvas_object parent
+                  JOIN ancestors ON ancestors.parent_id = parent.id
+            )
+            UPDATE odoo_canvas_object
+               SET graph_version = COALESCE(graph_version, 0) + 1
+             WHERE id IN (SELECT id FROM ancestors WHERE parent_id IS NULL)
+                OR id = ANY(%(ids)s)
+        """, {'ids': self.ids})
+        self.invalidate_model(['graph_version'])
+
+    def _get_root(self):
+        """ :returns: the id of the topmost ancestor of this element, and the
+            graph version of its canvas
+        """
+        self.ensure_one()
+        self.flush_model(['parent_id', 'graph_version'])
+        self.env.cr.execute("""
+            WITH RECURSIVE ancestors AS (
+                SELECT id, parent_id, graph_version FROM odoo_canvas_object WHERE id = %s
+                 UNION
+                SELECT parent.id, parent.parent_id, parent.graph_version
+                  FROM odoo_canvas_object parent
+                  JOIN ancestors ON ancestors.parent_id = parent.id
+            )
+            SELECT id, graph_version FROM ancestors WHERE parent_id IS NULL
+        """, (self.id,))
+        row = self.env.cr.fetchone()
+        return row if row else (self.id, self.graph_version)
+
+    @api.model
+    @tools.ormcache('root_id', 'version')
+    def _get_canvas_adjacency(self, root_id, version):
+        """ Build the adjacency of the canvas below the given root element. As
+        the version is part of the key, an outdated adjacency is never used
+        again once the canvas changes. The returned object is shared by the
+        callers and must not be modified.
+
+        :param int root_id: id of the root element of the canvas
+        :param int version: graph version of the root element
+        :rtype: CanvasAdjacency
+        """
+        graph = self.browse(root_id).sudo().get_graph()
+        id_column = graph['fields'].index('id')
+        parent_column = graph['fields'].index('parent_id')
+        ids = [node[id_column] for node in graph['nodes']]
+        id_to_index = {element_id: index for index, element_id in enumerate(ids)}
+        tree_edges = [
+            (id_to_index[node[id_column]], id_to_index[node[parent_column]])
+            for node in graph['nodes']
+            if node[id_column] != root_id and node[parent_column] in id_to_index
+        ]
+        link_edges = [
+            (id_to_index[source], id_to_index[target])
+            for source, target in graph['links']
+            if target in id_to_index and source != target
+        ]
+        return CanvasAdjacency(ids, tree_edges, link_edges)
+
+    def _get_adjacency(self):
+        self.ensure_one()
+        self.check_access_rights('read')
+        adjacency = self._get_canvas_adjacency(*self._get_root())
+        return adjacency, adjacency.index(self.id)
+
+    def get_reachable_elements(self, include_tree=True, max_depth=None):
+        """ Return the elements of the canvas that can be reached from this
+        element, following links (and parent/child relations if
+        ``include_tree``) in any direction.
+
+        :param bool include_tree: also follow the parent/child relations
+        :param int max_depth: maximum number of hops, no limit if not set
+        :returns: ids of the reachable elements, this one excluded
+        :rtype: list
+        """
+        adjacency, start = self._get_adjacency()
+        reached = adjacency.bfs(start, include_tree, max_depth)
+        return [adjacency.ids[index] for index in reached if index != start]
+
+    def get_shortest_path(self, target_id, include_tree=True):
+        """ Return the shortest path from this element to another element of
+        the same canvas.
+
+        :param int target_id: id of the element to reach
+        :param bool include_tree: also follow the parent/child relations
+        :returns: ids of the elements of the path, both ends included, or an
+            empty list if the target cannot be reached
+        :rtype: list
+        """
+        adjacency, start = self._get_adjacency()
+        target = adjacency.index(target_id)
+        if target is None:
+            return []
+        predecessors = adjacency.bfs(start, include_tree)
+        if target not in predecessors:
+            return []
+        path = []
+        while target is not None:
+            path.append(adjacency.ids[target])
+            target = predecessors[target]
+        return path[::-1]
+
+    def get_connected_components(self, include_tree=False):
+        """ Return the groups of elements of the canvas of this element that
+        are connected to each other. As every element of a canvas is connected
+        through the tree, only links are followed by default.
+
+        :param bool include_tree: also follow the parent/child relations
+        :returns: list of lists of ids, one per component
+        :rtype: list
+        """
+        adjacency, _start = self._get_adjacency()
+        components = []
+        visited = set()
+        for index in range(len(adjacency.ids)):
+            if index in visited:
+                continue
+            component = adjacency.bfs(index, include_tree)
+            visited.update(component)
+            components.append([adjacency.ids[reached] for reached in sorted(component)])
+        return components
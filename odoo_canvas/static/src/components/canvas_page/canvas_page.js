@@ -1,7 +1,7 @@
 /** @odoo-module **/
 
 import { Sketchpad } from "../sketchpad/sketchpad";
-import { Component } from "@odoo/owl";
+import { Component, onWillStart, useState } from "@odoo/owl";
 
 /**
  * This funciton contains all components that we will be displaying in the template
@@ -15,4 +15,28 @@ import { Component } from "@odoo/owl";
 export class CanvasPage extends Component {
   static template = "odoo_canvas.canvas_page";
   static components = { Sketchpad };
+  static props = {
+    canvasId: { type: String, optional: true },
+  };
+
+  setup() {
+    this.state = useState({ canvas: null });
+    onWillStart(() => this.loadCanvas());
+  }
+
+  /**
+   * Fetches the metadata and content of the canvas from the gzip compressed
+   * JSON data route. The browser revalidates it with its ETag, so that an
+   * unchanged canvas is not downloaded again.
+   */
+  async loadCanvas() {
+    if (!this.props.canvasId) return;
+    const response = await fetch(`/canvas/${encodeURIComponent(this.props.canvasId)}/data`, {
+      headers: { Accept: "application/json" },
+    });
+    // visitors that are not logged in are redirected to the login page
+    if (response.ok && !response.redirected) {
+      this.state.canvas = await response.json();
+    }
+  }
 }
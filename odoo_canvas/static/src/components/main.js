@@ -11,10 +11,12 @@ import { CanvasPage } from "./canvas_page/canvas_page";
 // configuration: https://github.com/odoo/owl/blob/master/doc/reference/app.md#configuration
 import { templates } from "@web/core/assets";
 owl.whenReady(() => {
-  if (document.getElementById("canvas-page")) {
-    mount(CanvasPage, document.getElementById("canvas-page"), {
+  const canvasPageEl = document.getElementById("canvas-page");
+  if (canvasPageEl) {
+    mount(CanvasPage, canvasPageEl, {
       templates,
       dev: true,
+      props: { canvasId: canvasPageEl.dataset.canvasId },
     });
   }
 });
@@ -1,6 +1,6 @@
 /** @odoo-module */
 import { session } from "@web/session";
-import { useState, useRef, onMounted, onWillUnmount, onWillStart } from "@odoo/owl";
+import { useState, useRef, onMounted, onWillUnmount } from "@odoo/owl";
 import { AbstractBehavior } from "@knowledge_canvas/components/behaviors/abstract_behavior/abstract_behavior";
 import { useService } from "@web/core/utils/hooks";
 import {
@@ -9,6 +9,55 @@ import {
 import { SketchTools } from "../sketchtools/sketchtools";
 
 const FREE_SKETCH_MODES = ["sketch", "erase"];
+// Maximum number of sketchpads loading their strokes at the same time
+const MAX_CONCURRENT_HYDRATIONS = 2;
+// Delay before asking again when the server is busy hydrating other sketchpads
+const HYDRATION_RETRY_DELAY = 500;
+
+let runningHydrations = 0;
+const hydrationQueue = [];
+// Pending requests of the sketchpad descriptors, per article
+const descriptorRequests = new Map();
+
+/**
+ * Fetches the lightweight descriptors of all the sketchpads of an article in
+ * a single call, shared by the sketchpads of the article that are mounted
+ * together.
+ * @param {Object} orm the orm service
+ * @param {number} articleId
+ * @returns {Promise<Map>} the descriptors, by sketchpad id
+ */
+function getSketchpadDescriptors(orm, articleId) {
+  if (!descriptorRequests.has(articleId)) {
+    const request = orm.call("knowledge.article", "get_sketchpad_descriptors", [[articleId]])
+      .then((descriptors) => new Map(descriptors.map((descriptor) => [descriptor.id, descriptor])));
+    descriptorRequests.set(articleId, request);
+    // sketchpads mounted later on (e.g. when the article is opened again) fetch fresh descriptors
+    const forget = () => descriptorRequests.delete(articleId);
+    request.then(forget, forget);
+  }
+  return descriptorRequests.get(articleId);
+}
+
+/**
+ * Queues the loading of the strokes of a sketchpad, so that an article with
+ * many sketchpads does not load all of them at once.
+ * @param {Function} hydrate async function loading the strokes
+ */
+function scheduleHydration(hydrate) {
+  hydrationQueue.push(hydrate);
+  runNextHydration();
+}
+
+function runNextHydration() {
+  if (runningHydrations >= MAX_CONCURRENT_HYDRATIONS || !hydrationQueue.length) return;
+  const hydrate = hydrationQueue.shift();
+  runningHydrations++;
+  hydrate().finally(() => {
+    runningHydrations--;
+    runNextHydration();
+  });
+}
 
 /**
  * This contains the logic of the sketchpad component which includes methods for drawing on the canvas
@@ -98,32 +147,10 @@ export class Sketchpad extends AbstractBehavior {
       allStrokes: [], // the history of actions taken by all users
       shapeHistory: [], // the history of shapes drawn by all users
       user: session.partner_id, // partner_id or G (guest) + the timestamp of initialization
-      id: parseInt(this.props.sketchpadId)
-    });
-
-    onWillStart(async () => {
-      const data = await this.orm.searchRead('knowledge_canvas.sketchpad_stroke_history', [
-        ["sketchpad_seq_id", "=", this.state.id]
-      ], ['stroke', 'user_identifier', 'deleted']);
-      this.state.allStrokes = data.map((stroke) => {
-        stroke.stroke.deleted = stroke.deleted;
-        return stroke.stroke;
-      });
-      // get list of strokes from server
-      const strokesCache = await this.orm.call(
-        'knowledge_canvas.sketchpad_stroke_history',
-        'join_sketchpad_session',
-        [this.state.id], { 'sketchpad_id': this.state.id }
-      )
-      this.state.allStrokes = this.state.allStrokes.concat(strokesCache.strokes)
-      // Initialize the stroke to be the next stroke in the sequence for the user
-      this._strokeId = this.state.allStrokes.reduce((max, stroke) => stroke.user === this.state.user ? Math.max(max, stroke.id) : max, -1) + 1;
-
-      //Create a channel specific for the sketchpad and add it to the listener
-      const channel = "knowledge_canvas_sketchpad_stroke_" + this.state.id
-      this.env.services['bus_service'].addChannel(channel);
-      this.env.services['bus_service'].addEventListener('notification', this.peekNotificationsInChannel.bind(this));
-      this.env.services['bus_service'].start();
+      id: parseInt(this.props.sketchpadId),
+      isHydrated: false, // the strokes are only loaded once the sketchpad is scrolled into view
+      thumbnailUrl: false, // shown until the strokes are loaded
+      strokeCount: null, // number of strokes of the sketchpad, null while unknown
     });
 
     /**
@@ -193,14 +220,72 @@ export class Sketchpad extends AbstractBehavior {
       this.templateModalRef.el.style.display = 'none'; //prevent double clicking on bg template button
 
       this.drawActionHistory();
+
+      this.descriptorLoaded = this.loadDescriptor();
+      // Load the strokes only when the sketchpad is about to be shown
+      this.hydrationObserver = new IntersectionObserver((entries) => {
+        if (entries.some((entry) => entry.isIntersecting)) {
+          this.hydrationObserver.disconnect();
+          scheduleHydration(() => this.hydrate());
+        }
+      }, { rootMargin: "200px" });
+      this.hydrationObserver.observe(this.canvasRef.el);
     });
 
 
     onWillUnmount(() => {
+      this.hydrationObserver?.disconnect();
       this._removeCanvasEventListeners()
     });
   }
 
+  /**
+   * Loads the descriptor of the sketchpad, fetched with the ones of the other
+   * sketchpads of the article, to show its thumbnail while its strokes are
+   * not loaded yet.
+   */
+  async loadDescriptor() {
+    const articleId = this.props.record.resId;
+    if (!articleId) return;
+    const descriptor = (await getSketchpadDescriptors(this.orm, articleId)).get(this.state.id);
+    if (descriptor) {
+      this.state.thumbnailUrl = descriptor.thumbnail_url;
+      this.state.strokeCount = descriptor.stroke_count;
+    }
+  }
+
+  /**
+   * Loads the strokes of the sketchpad, both the ones saved in the database
+   * and the pending ones, then joins the collaborative session. The strokes
+   * of an empty sketchpad are not requested.
+   */
+  async hydrate() {
+    // without a descriptor, the strokes are requested anyway
+    await this.descriptorLoaded.catch(() => {});
+    let data = { strokes: [] };
+    if (this.state.strokeCount !== 0) {
+      data = await this.orm.call('knowledge_canvas.sketchpad', 'hydrate_sketchpad', [[this.state.id]]);
+    }
+    while (data.retry) {
+      await new Promise((resolve) => setTimeout(resolve, HYDRATION_RETRY_DELAY));
+      data = await this.orm.call('knowledge_canvas.sketchpad', 'hydrate_sketchpad', [[this.state.id]]);
+    }
+    this.state.allStrokes = data.strokes;
+    // Initialize the stroke to be the next stroke in the sequence for the user
+    this._strokeId = this.state.allStrokes.reduce((max, stroke) => stroke.user === this.state.user ? Math.max(max, stroke.id) : max, -1) + 1;
+
+    //Create a channel specific for the sketchpad and add it to the listener
+    const channel = "knowledge_canvas_sketchpad_stroke_" + this.state.id
+    this.env.services['bus_service'].addChannel(channel);
+    this.env.services['bus_service'].addEventListener('notification', this.peekNotificationsInChannel.bind(this));
+    this.env.services['bus_service'].start();
+
+    this.state.isHydrated = true;
+    if (this.state.canvasContext) {
+      this.drawActionHistory();
+    }
+  }
+
   canvasRef = useRef("canvas");
   overlayCanvasRef = useRef("overlayCanvas");
   drawTextInputRef = useRef("drawTextInput");
@@ -850,6 +935,7 @@ export class Sketchpad extends AbstractBehavior {
    */
   onMouseDown(ev) {
     ev.preventDefault();
+    if (!this.state.isHydrated) return;
     if (this.canvasRef.el.offsetWidth != this.state.canvasWidth) {
       this.handleResize()
     }
@@ -1022,7 +1108,7 @@ export class Sketchpad extends AbstractBehavior {
    */
   sketchClick(ev) {
     ev.preventDefault(); // prevents the canvas from getting selected on touch devices
-    if (this.state.disableClick) return;
+    if (this.state.disableClick || !this.state.isHydrated) return;
     let mousePosition = this.getMousePosition(ev);
 
 